@@ -0,0 +1,72 @@
+"""Times the reading of all the values of a generated xlsx workbook, and
+of the given xlsx or xls files, with each value backend.
+
+    PYTHONPATH=. python benchmarks/bench_backends.py --rows 20000 data.xls
+"""
+
+import argparse
+import datetime
+import os
+import shutil
+import tempfile
+import time
+
+import openpyxl
+
+from sheetparser import load_workbook
+
+BACKENDS = {'.xlsx': ('_calamine', '_xlsx', '_openpyxl', '_xlrd'),
+            '.xls': ('_calamine', '_xlrd')}
+
+
+def make_xlsx(filename, rows, columns):
+    wbk = openpyxl.Workbook(write_only=True)
+    sheet = wbk.create_sheet('data')
+    start = datetime.datetime(2017, 1, 1)
+    for row in range(rows):
+        values = ['r%dc%d' % (row, col) if col % 3 == 0 else
+                  row * col if col % 3 == 1 else None
+                  for col in range(columns)]
+        values[-1] = start + datetime.timedelta(days=row)
+        sheet.append(values)
+    wbk.save(filename)
+
+
+def read_values(filename, backend):
+    start = time.perf_counter()
+    wbk = load_workbook(filename, with_backend=backend)
+    count = 0
+    for sheet in wbk:
+        for row in range(sheet.top, sheet.bottom):
+            values = sheet.row_data(row, sheet.left, sheet.right).values
+            count += len(values)
+    if hasattr(wbk, 'close'):
+        wbk.close()
+    return time.perf_counter() - start, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares the value backends')
+    parser.add_argument('files', nargs='*', help='other xlsx or xls files')
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--columns', type=int, default=20)
+    args = parser.parse_args()
+    directory = tempfile.mkdtemp()
+    try:
+        generated = os.path.join(directory, 'generated.xlsx')
+        make_xlsx(generated, args.rows, args.columns)
+        for filename in [generated] + args.files:
+            print(os.path.basename(filename))
+            for backend in BACKENDS[os.path.splitext(filename)[1]]:
+                try:
+                    elapsed, count = read_values(filename, backend)
+                except ImportError as e:
+                    print('  %-10s unavailable (%s)' % (backend, e))
+                    continue
+                print('  %-10s %7.2fs %9d cells' % (backend, elapsed, count))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
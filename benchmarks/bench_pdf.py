@@ -0,0 +1,146 @@
+"""Times the reading of a generated pdf file holding a wide table: the
+table building (Page and PdfTable) on the text lines found by
+pdfminer and, with --full, the whole load_workbook, where pdfminer's
+grouping of the text boxes dominates. --workers times load_workbook
+with a pool of processes, and --grid the text grid mode, checking that
+it finds the same tables.
+
+    PYTHONPATH=. python benchmarks/bench_pdf.py --rows 300 --columns 50
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from pdfminer.layout import LAParams
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.converter import PDFPageAggregator
+
+from sheetparser import load_workbook
+from sheetparser.backends._pdfminer import (Page, PdfTable, Position,
+                                            TextFrame, LTTextLineHorizontal)
+
+COLUMN_WIDTH = 60
+ROW_HEIGHT = 12
+MARGIN = 40
+
+
+def make_table_pdf(filename, rows, columns, rows_per_page=60):
+    """writes a pdf with a table of numbers, in Helvetica, one line of
+    text per cell"""
+    width = columns * COLUMN_WIDTH + 2 * MARGIN
+    height = rows_per_page * ROW_HEIGHT + 2 * MARGIN
+    pages = []
+    for first in range(0, rows, rows_per_page):
+        lines = ['BT /F1 8 Tf']
+        for row in range(first, min(first + rows_per_page, rows)):
+            y = height - MARGIN - (row - first) * ROW_HEIGHT
+            for col in range(columns):
+                text = 'c%d' % col if row == 0 else '%d.%02d' % (row * col, col)
+                lines.append('1 0 0 1 %d %d Tm (%s) Tj' % (
+                    MARGIN + col * COLUMN_WIDTH, y, text))
+        lines.append('ET')
+        pages.append('\n'.join(lines).encode('ascii'))
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', None,
+               b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for content in pages:
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream'
+                       % (len(content), content))
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+                       b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>'
+                       % (width, height, len(objects)))
+        kids.append(b'%d 0 R' % len(objects))
+    objects[1] = (b'<< /Type /Pages /Kids [%s] /Count %d >>'
+                  % (b' '.join(kids), len(kids)))
+    with open(filename, 'wb') as f:
+        f.write(b'%PDF-1.4\n')
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(f.tell())
+            f.write(b'%d 0 obj\n%s\nendobj\n' % (number, body))
+        xref = f.tell()
+        f.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b'%010d 00000 n \n' % offset)
+        f.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+                % (len(objects) + 1, xref))
+
+
+def text_lines(filename):
+    """the text lines of each page, as found by pdfminer. The text
+    boxes are not grouped, which doesn't change the lines"""
+    rsrcmgr = PDFResourceManager(caching=True)
+    device = PDFPageAggregator(rsrcmgr, laparams=LAParams(boxes_flow=None))
+    interpreter = PDFPageInterpreter(rsrcmgr, device)
+    result = []
+    with open(filename, 'rb') as f:
+        for page in PDFPage.get_pages(f):
+            interpreter.process_page(page)
+            lines = []
+            stack = [device.get_result()]
+            while stack:
+                item = stack.pop()
+                if isinstance(item, LTTextLineHorizontal):
+                    lines.append(TextFrame(Position(item.x0, item.y0, item.x1, item.y1),
+                                           item.get_text()))
+                elif hasattr(item, '__iter__'):
+                    stack.extend(item)
+            result.append(lines)
+    return result
+
+
+def build_tables(pages):
+    for lines in pages:
+        page = Page()
+        for line in lines:
+            page.add_text(line)
+        PdfTable(page.aligned_frames).get_table()
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Times the pdf backend')
+    parser.add_argument('--rows', type=int, default=300)
+    parser.add_argument('--columns', type=int, default=50)
+    parser.add_argument('--full', action='store_true',
+                        help='also time load_workbook')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='also time load_workbook with a pool of processes')
+    parser.add_argument('--grid', action='store_true',
+                        help='also time load_workbook in text grid mode')
+    args = parser.parse_args()
+    directory = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(directory, 'wide.pdf')
+        make_table_pdf(filename, args.rows, args.columns)
+        print('%d rows, %d columns' % (args.rows, args.columns))
+        elapsed, pages = timed(text_lines, filename)
+        print('  pdfminer lines    %7.2fs' % elapsed)
+        elapsed, __ = timed(build_tables, pages)
+        print('  Page and PdfTable %7.2fs' % elapsed)
+        if args.full:
+            elapsed, __ = timed(load_workbook, filename)
+            print('  load_workbook     %7.2fs' % elapsed)
+        if args.workers:
+            elapsed, __ = timed(lambda: load_workbook(filename, workers=args.workers))
+            print('  %2d workers        %7.2fs' % (args.workers, elapsed))
+        if args.grid:
+            elapsed, grid = timed(lambda: load_workbook(filename, grid=True))
+            print('  text grid         %7.2fs' % elapsed)
+            if args.full:
+                print('  same tables: %s' % (grid.data == load_workbook(filename).data))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
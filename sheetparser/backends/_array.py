@@ -2,7 +2,6 @@
 
 from __future__ import print_function
 
-import csv
 import logging
 
 
@@ -40,6 +39,9 @@ class rawSheet(SheetDocument, CellRange):
     def is_hidden(self):
         return False
 
+    def is_hidden_row(self, rowidx):
+        return False
+
     def cell(self, row, col):
         try:
             return rawCell(row, col, self.data[row][col])
@@ -64,7 +66,8 @@ class rawWorkbook(WorkbookDocument):
 
 
 def load_workbook(filename, options=None, with_formatting=False):
-    assert not with_formatting
-    options = options or {}
-    with open(filename, 'rb') as f:
-        return rawWorkbook({1: list(csv.reader(f, **options))})
+    """reads a csv file, see the `_csv` backend. The sheet is named 1,
+    as it always was with this backend."""
+    from . import _csv
+    return _csv.load_workbook(filename, with_formatting, names=[1],
+                              **(options or {}))
@@ -0,0 +1,140 @@
+"""Reads the values of xlsx, xls, xlsb and ods workbooks with
+python-calamine. A sheet is loaded at once as a dense list of rows by
+the compiled reader; there is no formatting, but the merged cells of
+xlsx files are known."""
+
+import datetime
+
+import python_calamine
+
+from ..documents import (CellRange, LineData, MergedCells, SheetDocument,
+                         WorkbookDocument)
+from ..utils import EMPTY_CELL, ConfigurationError
+from ._array import rawCell
+
+# the options that tune how the other backends read the sheets
+IGNORED_OPTIONS = frozenset(['window', 'on_demand'])
+
+
+def convert(value):
+    """calamine returns a date for the datetime cells without a time:
+    they are read as datetimes, as with the other backends"""
+    if type(value) is datetime.date:
+        return datetime.datetime(value.year, value.month, value.day)
+    return value
+
+
+class calamineCell(rawCell):
+    def __init__(self, row, column, value, is_merged):
+        super(calamineCell, self).__init__(row, column, value)
+        self._is_merged = is_merged
+
+    @property
+    def is_merged(self):
+        return self._is_merged
+
+
+class calamineSheet(SheetDocument, CellRange):
+    """A sheet, loaded when its cells are first needed. `data` is the
+    list of rows from the first row and column of the sheet, all of
+    the same length."""
+
+    def __init__(self, workbook, metadata):
+        self.workbook = workbook
+        self.name = metadata.name
+        self.visible = metadata.visible
+        self.top, self.left = 0, 0
+        self._data = None
+        self.merged = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            sheet = self.workbook.wbk.get_sheet_by_name(self.name)
+            self._data = sheet.to_python(skip_empty_area=False)
+            self.merged = MergedCells(
+                (top, bottom + 1, left, right + 1)
+                for (top, left), (bottom, right) in sheet.merged_cell_ranges or ())
+        return self._data
+
+    def release(self):
+        self._data = None
+        self.merged = None
+
+    @property
+    def bottom(self):
+        return len(self.data)
+
+    @property
+    def right(self):
+        return len(self.data[0]) if self.data else 0
+
+    def is_hidden(self):
+        return self.visible != python_calamine.SheetVisibleEnum.Visible
+
+    def is_hidden_row(self, rowidx):
+        """calamine doesn't read the heights of the rows"""
+        return False
+
+    def _value(self, row, col):
+        try:
+            return convert(self.data[row][col])
+        except IndexError:
+            return None
+
+    def cell(self, row, col):
+        data = self.data
+        anchor = self.merged.get((row, col))
+        if anchor is not None:
+            return calamineCell(row, col, self._value(*anchor), True)
+        return calamineCell(row, col, self._value(row, col), False)
+
+    def row_data(self, row, left, right):
+        data = self.data
+        if self.merged or row >= len(data):
+            return super(calamineSheet, self).row_data(row, left, right)
+        values = [convert(value) for value in data[row][left:right]]
+        values.extend([EMPTY_CELL] * (right - left - len(values)))
+        return LineData(values, [False] * len(values),
+                        [value == EMPTY_CELL for value in values])
+
+    def __repr__(self):
+        return "<calamineSheet %s>" % self.name
+
+
+class calamineWorkbook(WorkbookDocument):
+    """A workbook loaded by calamine. The options that only tune how
+    the other backends read the sheets (`window`, `on_demand`) are
+    accepted and ignored, so that the backend can replace them; any
+    other option is an error."""
+
+    def __init__(self, filename, with_formatting=False, **options):
+        if with_formatting:
+            raise ConfigurationError("The calamine backend doesn't read formatting")
+        unknown = set(options) - IGNORED_OPTIONS
+        if unknown:
+            raise ConfigurationError("Unknown options for the calamine backend: %s"
+                                     % ', '.join(sorted(unknown)))
+        self.wbk = python_calamine.CalamineWorkbook.from_object(filename)
+        self.sheets = [metadata for metadata in self.wbk.sheets_metadata
+                       if metadata.typ == python_calamine.SheetTypeEnum.WorkSheet]
+
+    def __iter__(self):
+        for metadata in self.sheets:
+            sheet = calamineSheet(self, metadata)
+            yield sheet
+            sheet.release()
+
+    def __getitem__(self, name_or_id):
+        if isinstance(name_or_id, str):
+            for metadata in self.sheets:
+                if metadata.name == name_or_id:
+                    return calamineSheet(self, metadata)
+            raise KeyError(name_or_id)
+        return calamineSheet(self, self.sheets[name_or_id])
+
+    def close(self):
+        self.wbk.close()
+
+
+load_workbook = calamineWorkbook
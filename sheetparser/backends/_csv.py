@@ -0,0 +1,233 @@
+"""Reads delimited text files (csv, tsv). A file is a sheet; a
+directory or a list of files is a workbook with a sheet per file.
+
+The files are not loaded in memory: a first pass counts the rows and
+notes where every `window`-th row starts in the file, then the windows
+of rows are parsed again when they are needed and only the last two
+are kept. The file is only open during the first pass and while a
+window is read."""
+
+import collections
+import contextlib
+import csv
+import io
+import itertools
+import mmap
+import os
+
+from ..documents import CellRange, LineData, SheetDocument, WorkbookDocument
+from ..utils import EMPTY_CELL, ConfigurationError
+from ._array import rawCell
+
+CHUNK_SIZE = 1 << 20
+ROW_WINDOW = 1000
+EXTENSIONS = ('.csv', '.tsv', '.txt')
+DIALECTS = {'.tsv': 'excel-tab'}
+DEFAULT_NAME = 'Sheet1'  # a file object without a name
+
+
+def _check_encoding(encoding):
+    """the lines are split on the newline byte before being decoded,
+    which requires an encoding extending ascii"""
+    if 'a\n'.encode(encoding)[-2:] != b'a\n':
+        raise ConfigurationError(
+            "Encoding %s is not supported, the file must be recoded" % encoding)
+
+
+def _check_line_endings(stream, size):
+    """the lines are split on the newline byte: a file whose lines end
+    with a lone carriage return (old Mac files) would be a single row"""
+    position = stream.tell()
+    data = stream.read(size)
+    stream.seek(position)
+    cr, lf = data.find(b'\r'), data.find(b'\n')
+    if cr != -1 and (lf == -1 or cr < lf) and data[cr + 1:cr + 2] not in (b'\n', b''):
+        raise ConfigurationError(
+            "Lines ending with a lone \\r are not supported, the file must "
+            "be converted to \\n or \\r\\n line endings")
+
+
+def _file_name(source):
+    """the name of a file, or of a file object"""
+    name = getattr(source, 'name', source)
+    return name if isinstance(name, (str, os.PathLike)) else DEFAULT_NAME
+
+
+class csvSheet(SheetDocument, CellRange):
+    """A delimited text file. `dialect` and the csv format parameters
+    are passed to `csv.reader`. The file is read by chunks of
+    `chunk_size` bytes, or through a memory map with `use_mmap`.
+    `filename` can also be a seekable binary file, which is never
+    closed by the sheet."""
+
+    def __init__(self, filename, name=None, dialect=None, encoding='utf-8',
+                 errors='strict', use_mmap=False, chunk_size=CHUNK_SIZE,
+                 window=ROW_WINDOW, **fmtparams):
+        _check_encoding(encoding)
+        self.filename = filename
+        self.is_file = not isinstance(filename, (str, os.PathLike))
+        __, ext = os.path.splitext(_file_name(filename))
+        self.name = name or os.path.basename(_file_name(filename))
+        self.dialect = dialect or DIALECTS.get(ext.lower(), 'excel')
+        self.fmtparams = fmtparams
+        self.encoding = encoding
+        self.errors = errors
+        self.use_mmap = use_mmap
+        self.chunk_size = chunk_size
+        self.window = window
+        self.top, self.left = 0, 0
+        self._offsets = None  # where the rows 0, window, 2 * window... start
+        self._bottom = self._right = 0
+        self._windows = collections.OrderedDict()  # the rows by window index
+
+    @contextlib.contextmanager
+    def _open(self):
+        """the binary stream of the file, opened for a read"""
+        if self.is_file:
+            yield self.filename
+            return
+        with io.open(self.filename, 'rb', buffering=self.chunk_size) as f:
+            if self.use_mmap and os.fstat(f.fileno()).st_size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as stream:
+                    yield stream
+            else:
+                yield f
+
+    def close(self):
+        """releases the rows kept in memory; the file is only open
+        while it is read"""
+        self._windows.clear()
+
+    def _lines(self, stream):
+        encoding, errors = self.encoding, self.errors
+        readline = stream.readline
+        while True:
+            line = readline()
+            if not line:
+                return
+            yield line.decode(encoding, errors)
+
+    def _read(self, stream, offset):
+        stream.seek(offset)
+        return csv.reader(self._lines(stream), self.dialect, **self.fmtparams)
+
+    def _scan(self):
+        if self._offsets is None:
+            offsets = [0]
+            window = self.window
+            right = 0
+            count = 0
+            with self._open() as stream:
+                _check_line_endings(stream, self.chunk_size)
+                for count, row in enumerate(self._read(stream, 0), 1):
+                    if len(row) > right:
+                        right = len(row)
+                    if count % window == 0:
+                        offsets.append(stream.tell())
+            self._bottom, self._right = count, right
+            self._offsets = offsets
+        return self._offsets
+
+    @property
+    def bottom(self):
+        self._scan()
+        return self._bottom
+
+    @property
+    def right(self):
+        self._scan()
+        return self._right
+
+    def is_hidden(self):
+        return False
+
+    def is_hidden_row(self, rowidx):
+        return False
+
+    def _window(self, index):
+        """the rows from `index` * `window`; the last two windows read
+        are kept, so that going back a few rows doesn't read again"""
+        rows = self._windows.get(index)
+        if rows is not None:
+            self._windows.move_to_end(index)
+            return rows
+        offsets = self._scan()
+        rows = []
+        if index < len(offsets):
+            with self._open() as stream:
+                rows = list(itertools.islice(self._read(stream, offsets[index]),
+                                             self.window))
+        self._windows[index] = rows
+        if len(self._windows) > 2:
+            self._windows.popitem(last=False)
+        return rows
+
+    def _row(self, row):
+        rows = self._window(row // self.window)
+        row %= self.window
+        return rows[row] if row < len(rows) else ()
+
+    def cell(self, row, col):
+        values = self._row(self.top + row)
+        col = self.left + col
+        return rawCell(row, col, values[col] if col < len(values) else None)
+
+    def row_data(self, row, left, right):
+        values = list(self._row(self.top + row)[left:right])
+        values.extend([EMPTY_CELL] * (right - left - len(values)))
+        return LineData(values, [False] * len(values),
+                        [value == EMPTY_CELL for value in values])
+
+    def __repr__(self):
+        return "<csvSheet %s>" % self.name
+
+
+def _list_files(source):
+    if hasattr(source, 'read'):
+        return [source]
+    if isinstance(source, (str, os.PathLike)):
+        if not os.path.isdir(source):
+            return [source]
+        return sorted(os.path.join(source, name) for name in os.listdir(source)
+                      if os.path.splitext(name)[1].lower() in EXTENSIONS)
+    return list(source)
+
+
+class csvWorkbook(WorkbookDocument):
+    """A csv file, a directory containing csv or tsv files, or a list
+    of files. The sheets are named after the files, without their
+    extension, or after `names`. The options are passed to each
+    `csvSheet`."""
+
+    def __init__(self, source, names=None, **options):
+        self.filenames = _list_files(source)
+        self.sheet_names = list(names or (
+            os.path.splitext(os.path.basename(_file_name(filename)))[0]
+            for filename in self.filenames))
+        self.options = options
+
+    def _sheet(self, index):
+        return csvSheet(self.filenames[index], self.sheet_names[index],
+                        **self.options)
+
+    def __iter__(self):
+        for index in range(len(self.filenames)):
+            sheet = self._sheet(index)
+            yield sheet
+            sheet.close()
+
+    def __getitem__(self, name_or_id):
+        if name_or_id in self.sheet_names:
+            name_or_id = self.sheet_names.index(name_or_id)
+        elif isinstance(name_or_id, str):
+            raise KeyError(name_or_id)
+        return self._sheet(name_or_id)
+
+    def __len__(self):
+        return len(self.filenames)
+
+
+def load_workbook(source, with_formatting=False, **options):
+    if with_formatting:
+        raise ConfigurationError("Text files have no formatting")
+    return csvWorkbook(source, **options)
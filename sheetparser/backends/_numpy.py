@@ -0,0 +1,210 @@
+"""Wraps data already in memory as a workbook: a dict that maps the
+sheet names to 2D NumPy arrays or to pandas DataFrames. The arrays,
+and the columns of the DataFrames, are used without copying them, and
+the empty cells (None, '', NaN, NaT and pandas.NA) of a sheet are found with
+vectorized operations when it is opened.
+
+    wbk = load_workbook({'prices': frame, 'rates': array})
+"""
+
+import bisect
+
+import numpy as np
+
+from ..documents import CellRange, LineData, SheetDocument, WorkbookDocument
+from ..utils import EMPTY_CELL, ConfigurationError
+from ._array import rawCell
+
+
+def _is_empty(value):
+    try:
+        return value is None or bool(value == EMPTY_CELL) or bool(value != value)
+    except TypeError:
+        # pandas.NA, whose comparisons are neither true nor false
+        return True
+
+
+def empty_mask(values):
+    """the boolean array of the empty cells of an array"""
+    kind = values.dtype.kind
+    if kind in 'fc':
+        return np.isnan(values)
+    if kind in 'mM':
+        return np.isnat(values)
+    if kind in 'US':
+        return values == values.dtype.type()
+    if kind == 'O':
+        try:
+            # NaN is the only value that is not equal to itself
+            return (np.equal(values, None) | np.equal(values, EMPTY_CELL) |
+                    np.not_equal(values, values))
+        except TypeError:
+            return np.frompyfunc(_is_empty, 1, 1)(values).astype(bool)
+    return np.zeros(values.shape, dtype=bool)
+
+
+def to_list(values):
+    """the values of a 1D array as Python objects; the datetimes are
+    converted to microseconds to be returned as `datetime` objects"""
+    kind = values.dtype.kind
+    if kind == 'M':
+        values = values.astype('datetime64[us]')
+    elif kind == 'm':
+        values = values.astype('timedelta64[us]')
+    return values.tolist()
+
+
+def _column_block(values, isna):
+    values = np.asarray(values)
+    empty = isna.to_numpy()
+    if values.dtype.kind == 'O':
+        empty = empty | empty_mask(values)
+    return values.reshape(-1, 1), empty.reshape(-1, 1)
+
+
+def frame_blocks(frame, index=False):
+    """the columns of a DataFrame, as 2D arrays of one column that
+    share the memory of the DataFrame, with their empty cells"""
+    blocks = []
+    if index:
+        blocks.append(_column_block(frame.index.to_numpy(), frame.index.isna()))
+    for __, series in frame.items():
+        blocks.append(_column_block(series.to_numpy(), series.isna()))
+    return blocks
+
+
+class numpySheet(SheetDocument, CellRange):
+    """A sheet made of blocks of columns: a 2D array is a single block,
+    a DataFrame has a block per column. With `header`, the first row
+    of the sheet holds the names of the columns of a DataFrame, and
+    with `index` its first column holds the index."""
+
+    def __init__(self, name, values, header=True, index=False):
+        self.name = name
+        self.top, self.left = 0, 0
+        self.header = None
+        if hasattr(values, 'columns'):
+            self.blocks = frame_blocks(values, index)
+            if header:
+                names = list(values.columns)
+                if index:
+                    names.insert(0, values.index.name)
+                self.header = [EMPTY_CELL if value is None else value
+                               for value in names]
+            rows = len(values)
+        else:
+            values = np.asarray(values)
+            if values.ndim != 2:
+                raise ValueError('Expected a 2D array, got %s dimensions'
+                                 % values.ndim)
+            self.blocks = [(values, empty_mask(values))]
+            rows = values.shape[0]
+        self.lefts = []
+        width = 0
+        for block, __ in self.blocks:
+            self.lefts.append(width)
+            width += block.shape[1]
+        self.first_row = 0 if self.header is None else 1
+        self.bottom = rows + self.first_row
+        self.right = width
+
+    def is_hidden(self):
+        return False
+
+    def is_hidden_row(self, rowidx):
+        return False
+
+    def _blocks(self, left, right):
+        """yields the blocks that contain the columns from left to
+        right (excluded), with the range of those columns in the block"""
+        i = max(bisect.bisect_right(self.lefts, left) - 1, 0)
+        for block_left, (block, empty) in zip(self.lefts[i:], self.blocks[i:]):
+            if block_left >= right:
+                return
+            start = max(left - block_left, 0)
+            end = min(right - block_left, block.shape[1])
+            if start < end:
+                yield block, empty, start, end
+
+    def cell(self, row, col):
+        if not (0 <= row < self.bottom and 0 <= col < self.right):
+            return rawCell(row, col, None)
+        if row < self.first_row:
+            return rawCell(row, col, self.header[col])
+        for block, empty, start, __ in self._blocks(col, col + 1):
+            index = row - self.first_row
+            if empty[index, start]:
+                return rawCell(row, col, None)
+            return rawCell(row, col, to_list(block[index, start:start + 1])[0])
+
+    def _line(self, values, empty, size):
+        values.extend([EMPTY_CELL] * (size - len(values)))
+        empty.extend([True] * (size - len(empty)))
+        return LineData([EMPTY_CELL if is_empty else value
+                         for value, is_empty in zip(values, empty)],
+                        [False] * size, empty)
+
+    def row_data(self, row, left, right):
+        values, empty = [], []
+        if row < self.first_row:
+            values = list(self.header[left:right])
+            empty = [value == EMPTY_CELL for value in values]
+        elif row < self.bottom:
+            row -= self.first_row
+            for block, block_empty, start, end in self._blocks(left, right):
+                values.extend(to_list(block[row, start:end]))
+                empty.extend(block_empty[row, start:end].tolist())
+        return self._line(values, empty, right - left)
+
+    def col_data(self, col, top, bottom):
+        values, empty = [], []
+        if top < self.first_row and col < self.right:
+            values.append(self.header[col])
+            empty.append(self.header[col] == EMPTY_CELL)
+        start, end = max(top - self.first_row, 0), bottom - self.first_row
+        for block, block_empty, column, __ in self._blocks(col, col + 1):
+            values.extend(to_list(block[start:end, column]))
+            empty.extend(block_empty[start:end, column].tolist())
+        return self._line(values, empty, bottom - top)
+
+    def row_cells(self, row, left, right):
+        data = self.row_data(row, left, right)
+        return [rawCell(row, col, value)
+                for col, value in enumerate(data.values, left)]
+
+    def col_cells(self, col, top, bottom):
+        data = self.col_data(col, top, bottom)
+        return [rawCell(row, col, value)
+                for row, value in enumerate(data.values, top)]
+
+    def __repr__(self):
+        return "<numpySheet %s>" % self.name
+
+
+class numpyWorkbook(WorkbookDocument):
+    """A dict of arrays or DataFrames, in the order of the dict. The
+    options are passed to each `numpySheet`."""
+
+    def __init__(self, values_map, **options):
+        self.data = values_map
+        self.options = options
+
+    def __iter__(self):
+        return (numpySheet(name, values, **self.options)
+                for name, values in self.data.items())
+
+    def __getitem__(self, name_or_id):
+        # the keys are the names, such as the page numbers of a pdf,
+        # and the other integers are positions
+        if name_or_id not in self.data and not isinstance(name_or_id, str):
+            name_or_id = list(self.data)[name_or_id]
+        return numpySheet(name_or_id, self.data[name_or_id], **self.options)
+
+    def __len__(self):
+        return len(self.data)
+
+
+def load_workbook(values_map, with_formatting=False, **options):
+    if with_formatting:
+        raise ConfigurationError("Arrays have no formatting")
+    return numpyWorkbook(values_map, **options)
@@ -0,0 +1,434 @@
+"""Reads OpenDocument spreadsheets (.ods). The content.xml of the file
+is streamed with expat handlers; repeated rows and cells are kept as
+runs and are never expanded, so the thousands of empty cells that
+usually end an ods sheet cost nothing. Covered cells are reported as
+merged and collapsed or filtered rows as hidden. The annotations of the
+cells are left out of their text.
+
+The values don't depend on the styles: their type is given by the
+office attributes of the cells. The borders and background of a cell
+come from its style, or else from the default cell style of its row
+or column, with the parent styles and the default style of styles.xml
+resolved."""
+
+import datetime
+import re
+import zipfile
+from bisect import bisect_right
+from xml.parsers import expat
+
+from ..documents import (BORDER_TOP, BORDER_LEFT,
+                         BORDER_BOTTOM, BORDER_RIGHT,
+                         CellRange, MergedCells, SheetDocument,
+                         WorkbookDocument)
+from ..utils import EMPTY_CELL
+
+TABLE_NS = 'urn:oasis:names:tc:opendocument:xmlns:table:1.0'
+OFFICE_NS = 'urn:oasis:names:tc:opendocument:xmlns:office:1.0'
+TEXT_NS = 'urn:oasis:names:tc:opendocument:xmlns:text:1.0'
+STYLE_NS = 'urn:oasis:names:tc:opendocument:xmlns:style:1.0'
+FO_NS = 'urn:oasis:names:tc:opendocument:xmlns:xsl-fo-compatible:1.0'
+
+DURATION = re.compile(r'-?P(?:(\d+)D)?T?(?:(\d+)H)?(?:(\d+)M)?(?:([\d.]+)S)?$')
+
+
+def _name(namespace, name):
+    return namespace + ' ' + name
+
+
+TABLE = _name(TABLE_NS, 'table')
+ROW = _name(TABLE_NS, 'table-row')
+CELL = _name(TABLE_NS, 'table-cell')
+COLUMN = _name(TABLE_NS, 'table-column')
+COVERED_CELL = _name(TABLE_NS, 'covered-table-cell')
+TABLE_NAME = _name(TABLE_NS, 'name')
+STYLE_NAME = _name(TABLE_NS, 'style-name')
+DEFAULT_CELL_STYLE = _name(TABLE_NS, 'default-cell-style-name')
+ROWS_REPEATED = _name(TABLE_NS, 'number-rows-repeated')
+COLUMNS_REPEATED = _name(TABLE_NS, 'number-columns-repeated')
+ROWS_SPANNED = _name(TABLE_NS, 'number-rows-spanned')
+COLUMNS_SPANNED = _name(TABLE_NS, 'number-columns-spanned')
+VISIBILITY = _name(TABLE_NS, 'visibility')
+VALUE_TYPE = _name(OFFICE_NS, 'value-type')
+ANNOTATION = _name(OFFICE_NS, 'annotation')
+PARAGRAPH = _name(TEXT_NS, 'p')
+SPACES = _name(TEXT_NS, 's')
+TAB = _name(TEXT_NS, 'tab')
+LINE_BREAK = _name(TEXT_NS, 'line-break')
+STYLE = _name(STYLE_NS, 'style')
+DEFAULT_STYLE = _name(STYLE_NS, 'default-style')
+STYLE_STYLE_NAME = _name(STYLE_NS, 'name')
+STYLE_FAMILY = _name(STYLE_NS, 'family')
+PARENT_STYLE_NAME = _name(STYLE_NS, 'parent-style-name')
+CELL_PROPERTIES = _name(STYLE_NS, 'table-cell-properties')
+TABLE_PROPERTIES = _name(STYLE_NS, 'table-properties')
+DISPLAY = _name(TABLE_NS, 'display')
+
+BORDERS = ((BORDER_TOP, 'border-top'), (BORDER_LEFT, 'border-left'),
+           (BORDER_BOTTOM, 'border-bottom'), (BORDER_RIGHT, 'border-right'))
+
+
+def parse_duration(value):
+    """converts a duration such as PT02H30M00S to a time, or to a
+    timedelta if it is negative or of a day or more"""
+    match = DURATION.match(value)
+    if match is None:
+        return value
+    days, hours, minutes, seconds = (float(i or 0) for i in match.groups())
+    seconds = int(round(days * 86400 + hours * 3600 + minutes * 60 + seconds))
+    if value.startswith('-'):
+        return -datetime.timedelta(seconds=seconds)
+    if seconds >= 86400:
+        return datetime.timedelta(seconds=seconds)
+    return datetime.time(seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
+def cell_value(value_type, attrs, text):
+    """the value of a cell from its office attributes, or its text"""
+    if value_type in ('float', 'percentage', 'currency'):
+        value = attrs.get(_name(OFFICE_NS, 'value'), text)
+        try:
+            return int(value) if value.lstrip('-').isdigit() else float(value)
+        except ValueError:
+            return value
+    if value_type == 'date':
+        value = attrs.get(_name(OFFICE_NS, 'date-value'), text)
+        try:
+            return datetime.datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    if value_type == 'time':
+        return parse_duration(attrs.get(_name(OFFICE_NS, 'time-value'), text))
+    if value_type == 'boolean':
+        return attrs.get(_name(OFFICE_NS, 'boolean-value')) == 'true'
+    return text
+
+
+class Fill(object):
+    def __init__(self, color):
+        self.type = 'patternFill'
+        self.pattern = 'solid' if color is not None else None
+        self.color1 = color
+        self.color2 = None
+
+    def __repr__(self):
+        return "<Fill %s %s %s %s>" % (self.type, self.pattern,
+                                       self.color1, self.color2)
+
+
+class Formatting(object):
+    """The borders and background of a cell style"""
+
+    def __init__(self, properties):
+        self.border_mask = 0
+        border = properties.get(_name(FO_NS, 'border'), 'none')
+        for mask, side in BORDERS:
+            if properties.get(_name(FO_NS, side), border) != 'none':
+                self.border_mask |= mask
+        color = properties.get(_name(FO_NS, 'background-color'), 'transparent')
+        if color.startswith('#') and len(color) == 7:
+            color = tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+        else:
+            color = None
+        self.fill = Fill(color)
+        self.is_filled = color is not None
+
+
+NO_FORMATTING = Formatting({})
+
+
+class odsCell(object):
+    def __init__(self, value, formatting, is_merged):
+        self.value = value
+        self.formatting = formatting
+        self.is_merged = is_merged
+
+    @property
+    def is_empty(self):
+        return self.value == EMPTY_CELL
+
+    @property
+    def border_mask(self):
+        return self.formatting.border_mask
+
+    def has_borders(self, mask):
+        return bool(self.formatting.border_mask & mask)
+
+    @property
+    def fill(self):
+        return self.formatting.fill
+
+    @property
+    def is_filled(self):
+        return self.formatting.is_filled
+
+    def __repr__(self):
+        return "<odsCell %r>" % (self.value,)
+
+
+class Runs(object):
+    """Items repeated over runs of indices. `starts` are the first
+    indices of the runs, kept sorted for bisection."""
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.items = []
+
+    def add(self, start, count, item):
+        self.starts.append(start)
+        self.ends.append(start + count)
+        self.items.append(item)
+
+    def get(self, index, default=None):
+        i = bisect_right(self.starts, index) - 1
+        if i >= 0 and index < self.ends[i]:
+            return self.items[i]
+        return default
+
+    def __bool__(self):
+        return bool(self.starts)
+
+
+class TableData(object):
+    """The content of a table: `rows` are runs of rows, each one a
+    Runs of (value, style name) cells. Only the rows and cells with a
+    value or a style are kept; `height` and `width` stop at the last
+    value. `row_styles` and `column_styles` are the runs of default
+    cell styles."""
+
+    def __init__(self, name, style):
+        self.name = name
+        self.style = style
+        self.rows = Runs()
+        self.hidden_rows = Runs()
+        self.row_styles = Runs()
+        self.column_styles = Runs()
+        self.merged_ranges = []
+        self.height = 0
+        self.width = 0
+
+
+class ContentReader(object):
+    """The expat handlers that read content.xml into TableData, and
+    the properties of the cell styles of content.xml and styles.xml.
+    `cell_styles` maps the style names, or None for the default
+    style, to their (parent name, properties)."""
+
+    def __init__(self):
+        self.tables = []
+        self.cell_styles = {}
+        self.hidden_styles = set()
+        self._table = None
+        self._style = None
+        self._column = 0
+        self._annotation = 0
+        self._row = 0
+        self._row_repeat = 1
+        self._row_cells = None
+        self._row_values = False
+        self._col = 0
+        self._cell = None
+        self._text = None
+        self._in_paragraph = False
+
+    def start(self, tag, attrs):
+        if tag == ANNOTATION:
+            self._annotation += 1
+        elif self._annotation:
+            return
+        elif tag == CELL or tag == COVERED_CELL:
+            self._cell = (attrs, int(attrs.get(COLUMNS_REPEATED, 1)))
+            if attrs.get(VALUE_TYPE) == 'string' or (
+                    VALUE_TYPE not in attrs and tag == CELL):
+                self._text = []
+        elif tag == PARAGRAPH:
+            self._in_paragraph = True
+            if self._text:
+                self._text.append('\n')
+        elif tag == SPACES:
+            if self._text is not None:
+                self._text.append(' ' * int(attrs.get(_name(TEXT_NS, 'c'), 1)))
+        elif tag == TAB:
+            if self._text is not None:
+                self._text.append('\t')
+        elif tag == LINE_BREAK:
+            if self._text is not None:
+                self._text.append('\n')
+        elif tag == ROW:
+            self._row_repeat = int(attrs.get(ROWS_REPEATED, 1))
+            self._row_cells = Runs()
+            self._row_values = False
+            self._col = 0
+            if attrs.get(VISIBILITY, 'visible') != 'visible':
+                self._table.hidden_rows.add(self._row, self._row_repeat, True)
+            if DEFAULT_CELL_STYLE in attrs:
+                self._table.row_styles.add(self._row, self._row_repeat,
+                                           attrs[DEFAULT_CELL_STYLE])
+        elif tag == COLUMN:
+            repeat = int(attrs.get(COLUMNS_REPEATED, 1))
+            if DEFAULT_CELL_STYLE in attrs:
+                self._table.column_styles.add(self._column, repeat,
+                                              attrs[DEFAULT_CELL_STYLE])
+            self._column += repeat
+        elif tag == TABLE:
+            self._table = TableData(attrs.get(TABLE_NAME), attrs.get(STYLE_NAME))
+            self._row = 0
+            self._column = 0
+        elif tag == STYLE or tag == DEFAULT_STYLE:
+            self._style = attrs.get(STYLE_STYLE_NAME) if tag == STYLE else None
+            if attrs.get(STYLE_FAMILY) == 'table-cell':
+                self.cell_styles[self._style] = (attrs.get(PARENT_STYLE_NAME), {})
+        elif tag == CELL_PROPERTIES:
+            if self._style in self.cell_styles:
+                self.cell_styles[self._style][1].update(attrs)
+        elif tag == TABLE_PROPERTIES:
+            if attrs.get(DISPLAY) == 'false':
+                self.hidden_styles.add(self._style)
+
+    def characters(self, text):
+        if self._in_paragraph and self._text is not None and not self._annotation:
+            self._text.append(text)
+
+    def end(self, tag):
+        if tag == ANNOTATION:
+            self._annotation -= 1
+        elif self._annotation:
+            return
+        elif tag == PARAGRAPH:
+            self._in_paragraph = False
+        elif tag == CELL or tag == COVERED_CELL:
+            self._end_cell(tag)
+        elif tag == ROW:
+            table = self._table
+            if self._row_cells:
+                table.rows.add(self._row, self._row_repeat, self._row_cells)
+                if self._row_values:
+                    table.height = self._row + self._row_repeat
+            self._row += self._row_repeat
+        elif tag == TABLE:
+            self.tables.append(self._table)
+            self._table = None
+
+    def _end_cell(self, tag):
+        (attrs, repeat), self._cell = self._cell, None
+        text = ''.join(self._text) if self._text is not None else ''
+        self._text = None
+        table, col = self._table, self._col
+        self._col += repeat
+        if tag == COVERED_CELL:
+            return
+        value_type = attrs.get(VALUE_TYPE)
+        value = (cell_value(value_type, attrs, text)
+                 if value_type is not None else text)
+        style = attrs.get(STYLE_NAME)
+        rows_spanned = int(attrs.get(ROWS_SPANNED, 1))
+        cols_spanned = int(attrs.get(COLUMNS_SPANNED, 1))
+        if rows_spanned > 1 or cols_spanned > 1:
+            table.merged_ranges.append((self._row, self._row + rows_spanned,
+                                        col, col + cols_spanned))
+        if value != EMPTY_CELL or style is not None:
+            self._row_cells.add(col, repeat, (value, style))
+        if value != EMPTY_CELL:
+            self._row_values = True
+            table.width = max(table.width, col + repeat)
+
+    def read(self, source):
+        parser = expat.ParserCreate(namespace_separator=' ')
+        parser.buffer_text = True
+        parser.StartElementHandler = self.start
+        parser.EndElementHandler = self.end
+        parser.CharacterDataHandler = self.characters
+        parser.ParseFile(source)
+        for table in self.tables:
+            for top, bottom, left, right in table.merged_ranges:
+                table.height = max(table.height, bottom)
+                table.width = max(table.width, right)
+        return self
+
+    def style_properties(self, name):
+        """the properties of a cell style, with those of its parents
+        and of the default style"""
+        chain = []
+        while name is not None and name in self.cell_styles and len(chain) < 100:
+            name, properties = self.cell_styles[name]
+            chain.append(properties)
+        result = dict(self.cell_styles.get(None, (None, {}))[1])
+        for properties in reversed(chain):
+            result.update(properties)
+        return result
+
+
+class odsSheet(SheetDocument, CellRange):
+    def __init__(self, workbook, table):
+        self.workbook = workbook
+        self.table = table
+        self.name = table.name
+        self.top, self.left = 0, 0
+        self.bottom = table.height
+        self.right = table.width
+        self.merged = MergedCells(table.merged_ranges)
+
+    def is_hidden(self):
+        return self.table.style in self.workbook.content.hidden_styles
+
+    def is_hidden_row(self, rowidx):
+        return self.table.hidden_rows.get(rowidx, False)
+
+    def cell(self, row, col):
+        anchor = self.merged.get((row, col))
+        is_merged = anchor is not None
+        if is_merged:
+            row, col = anchor
+        value, style = EMPTY_CELL, None
+        cells = self.table.rows.get(row)
+        if cells is not None:
+            value, style = cells.get(col, (EMPTY_CELL, None))
+        if style is None:
+            style = self.table.row_styles.get(row)
+        if style is None:
+            style = self.table.column_styles.get(col)
+        return odsCell(value, self.workbook.get_formatting(style), is_merged)
+
+    def __repr__(self):
+        return "<odsSheet %s>" % self.name
+
+
+class odsWorkbook(WorkbookDocument):
+    """Reads content.xml when opened, and styles.xml for the common
+    cell styles when the formatting is read."""
+
+    def __init__(self, filename, with_formatting=True):
+        self.with_formatting = with_formatting
+        self._formatting = {}
+        self.content = ContentReader()
+        with zipfile.ZipFile(filename) as zfile:
+            if with_formatting and 'styles.xml' in zfile.namelist():
+                with zfile.open('styles.xml') as source:
+                    self.content.read(source)
+            with zfile.open('content.xml') as source:
+                self.content.read(source)
+
+    def get_formatting(self, style):
+        if not self.with_formatting:
+            return None
+        formatting = self._formatting.get(style)
+        if formatting is None:
+            properties = self.content.style_properties(style)
+            formatting = Formatting(properties) if properties else NO_FORMATTING
+            self._formatting[style] = formatting
+        return formatting
+
+    def __iter__(self):
+        return (odsSheet(self, table) for table in self.content.tables)
+
+    def __getitem__(self, name_or_id):
+        if isinstance(name_or_id, str):
+            for table in self.content.tables:
+                if table.name == name_or_id:
+                    return odsSheet(self, table)
+            raise KeyError(name_or_id)
+        return odsSheet(self, self.content.tables[name_or_id])
+
+
+load_workbook = odsWorkbook
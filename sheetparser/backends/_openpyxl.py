@@ -4,20 +4,27 @@
 # http://blog.softartisans.com/2013/05/13/kb-excels-color-palette-explained/
 from __future__ import print_function
 
+import collections
 import logging
 import re
+import weakref
+from xml.etree.ElementTree import iterparse
 
 import openpyxl
 import openpyxl.comments
 import openpyxl.styles
 import six
+from openpyxl.worksheet._reader import WorkSheetParser
 
 from ..documents import (BORDER_TOP, BORDER_LEFT,
                          BORDER_BOTTOM, BORDER_RIGHT,
-                         CellRange, SheetDocument, WorkbookDocument)
-from ..utils import EMPTY_CELL
+                         CellRange, MergedCells, SheetDocument,
+                         WorkbookDocument)
+from ..utils import EMPTY_CELL, ConfigurationError
 
 SHEETSTATE_VISIBLE = openpyxl.worksheet.worksheet.Worksheet.SHEETSTATE_VISIBLE
+SHEET_MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+ROW_WINDOW = 1000
 logger = logging.getLogger('sheetparser')
 
 
@@ -32,9 +39,7 @@ def color_tuple(hexastring):
 # solution to the theme in wksheet_fmt.parent.loaded_theme.decode('utf-8')
 
 class Fill(object):
-    def __init__(self, cell):
-        fill = cell.fill
-        book = cell.parent.parent
+    def __init__(self, fill, book):
         self.type = fill.tagname
         self.color1 = None
         self.color2 = None
@@ -68,55 +73,56 @@ class Fill(object):
 
 
 class Formatting(object):
-    def __init__(self, cell):
-        self._cell = cell
-        self._border_mask = None
+    """The formatting of a style id. It is computed once per workbook
+    and shared by all the cells with that style"""
+
+    def __init__(self, book, style_id):
+        self._book = book
+        self._style = book._cell_styles[style_id]
+        border = book._borders[self._style.borderId]
+        self.border_mask = (
+                (BORDER_TOP * (border.top.style is not None)) |
+                (BORDER_LEFT * (border.left.style is not None)) |
+                (BORDER_BOTTOM * (border.bottom.style is not None)) |
+                (BORDER_RIGHT * (border.right.style is not None)))
         self._fill = None
-
-    @property
-    def border_mask(self):
-        if self._border_mask is None:
-            border = self._cell.border
-            if border is None:
-                self._border_mask = 0
-            else:
-                self._border_mask = (
-                        (BORDER_TOP * (border.top.style is not None)) |
-                        (BORDER_LEFT * (border.left.style is not None)) |
-                        (BORDER_BOTTOM * (border.bottom.style is not None)) |
-                        (BORDER_RIGHT * (border.right.style is not None)))
-        return self._border_mask
+        self._is_filled = None
 
     @property
     def fill(self):
         if self._fill is None:
-            self._fill = Fill(self._cell)
+            self._fill = Fill(self._book._fills[self._style.fillId], self._book)
         return self._fill
 
     @property
     def is_filled(self):
-        return self.fill.type != 'patternFill' or self.fill.pattern is not None
+        if self._is_filled is None:
+            self._is_filled = (self.fill.type != 'patternFill' or
+                               self.fill.pattern is not None)
+        return self._is_filled
 
 
 class opxlCell(object):
-    def __init__(self, value, cell, wksheet_fmt, is_merged):
-        self._cell = cell
+    def __init__(self, value, formatting, is_merged, sheet=None,
+                 row=None, column=None):
         self.value = EMPTY_CELL if value is None else value
-        self._wksheet_fmt = wksheet_fmt  # used to write back
-        self._formatting = None
+        self.formatting = formatting
         self.is_merged = is_merged
+        self._sheet = sheet  # used to write back
+        self._row = row
+        self._column = column
 
     def get_cell(self):
-        return self._cell
-
-    @property
-    def formatting(self):
-        if self._formatting is None:
-            self._formatting = Formatting(self._cell)
-        return self._formatting
+        """returns the openpyxl cell, that can be modified and saved
+        with the workbook `wbk_fmt`"""
+        wksheet_fmt = self._sheet.wksheet_fmt if self._sheet else None
+        if wksheet_fmt is None:
+            raise ConfigurationError("Cells of a read-only workbook"
+                                     " can't be written back")
+        return wksheet_fmt.cell(row=self._row, column=self._column)
 
     def __repr__(self):
-        return "<opxlCell %s %s>" % (self._cell.row, self._cell.column)
+        return "<opxlCell %s %s>" % (self._row, self._column)
 
     @property
     def border_mask(self):
@@ -153,93 +159,306 @@ class opxlCell(object):
             comment.author = author
 
 
-class EmptyCell(opxlCell):
+def _merged_ranges(refs):
+    """converts the merged ranges refs such as 'A1:B2' to (top,
+    bottom, left, right) ranges as used by MergedCells"""
+    for ref in refs:
+        clo, rlo, chi, rhi = openpyxl.utils.range_boundaries(ref)
+        yield rlo, rhi + 1, clo, chi + 1
+
+
+def _read_sheet_layout(source):
+    """Reads the merged ranges, the hidden rows and the size of a
+    worksheet xml without building its cells. Returns the list of
+    merged ranges (as strings), the set of hidden rows and the last
+    row and column used"""
+    merged_ranges = []
+    hidden_rows = set()
+    max_row = max_col = 0
+    sheet_data = None
+    for event, elem in iterparse(source, events=('start', 'end')):
+        tag = elem.tag
+        if event == 'start':
+            if tag == SHEET_MAIN_NS + 'sheetData':
+                sheet_data = elem
+            continue
+        if tag == SHEET_MAIN_NS + 'c':
+            ref = elem.get('r')
+            if ref is not None:
+                max_col = max(max_col, openpyxl.utils.column_index_from_string(
+                    ref.rstrip('0123456789')))
+        elif tag == SHEET_MAIN_NS + 'row':
+            row = int(elem.get('r', max_row + 1))
+            max_row = max(max_row, row)
+            if elem.get('hidden') in ('1', 'true'):
+                hidden_rows.add(row)
+            sheet_data.clear()  # keep the memory flat
+        elif tag == SHEET_MAIN_NS + 'mergeCell':
+            merged_ranges.append(elem.get('ref'))
+    return merged_ranges, hidden_rows, max_row, max_col
+
+
+class opxlStreamingSheet(SheetDocument, CellRange):
+    """A sheet of a read-only workbook. The rows are read in sequence
+    and only a window of rows is kept in memory; reading a row before
+    that window starts the reading again from that row. The merged
+    cells and hidden rows are read separately from the sheet xml."""
+
+    def __init__(self, workbook, wksheet):
+        self.name = wksheet.title
+        self.workbook = workbook
+        self.wksheet = wksheet
+        self.window = workbook.window
+        source = wksheet._get_source()
+        try:
+            merged_ranges, self.hidden_rows, max_row, max_col = (
+                _read_sheet_layout(source))
+        finally:
+            source.close()
+        self.merged = MergedCells(_merged_ranges(merged_ranges)
+                                  if workbook.with_formatting else ())
+        self._anchors = {}  # top left cells of merged ranges
+        self._rows = collections.deque()
+        self._first_row = 1
+        self._row_iter = None
+        # the <dimension> of the sheet is often stale in generated
+        # files: the rows are read up to the last one found
+        wksheet.reset_dimensions()
+        self.top, self.left = 1, 1
+        self.bottom = max_row + 1
+        self.right = max_col + 1
 
-    def __init__(self, column, row, sheet):
-        self.column = column
-        self.row = row
-        super(EmptyCell, self).__init__(None, None, sheet, False)
+    def is_hidden(self):
+        return self.wksheet.sheet_state != SHEETSTATE_VISIBLE
 
-    def get_cell(self):
-        if self._cell is None:
-            self._cell = self.sheet.cell(column=self.column, row=self.row)
-        return self._cell
+    def is_hidden_row(self, rowidx):
+        return rowidx + 1 in self.hidden_rows
+
+    def _iter_rows(self, abs_row):
+        """yields the rows from `abs_row` as the iter_rows of openpyxl,
+        but closes the sheet xml when the iteration is closed"""
+        wksheet = self.wksheet
+        book = wksheet.parent
+        source = wksheet._get_source()
+        try:
+            parser = WorkSheetParser(source, wksheet._shared_strings,
+                                     data_only=book.data_only, epoch=book.epoch,
+                                     date_formats=book._date_formats)
+            for rowx, cells in parser.parse():
+                if rowx < abs_row:
+                    continue
+                while abs_row < rowx:  # the missing rows
+                    abs_row += 1
+                    yield ()
+                abs_row += 1
+                yield wksheet._get_row(cells)
+        finally:
+            source.close()
+
+    def _restart(self, abs_row):
+        self.close()
+        self._row_iter = self._iter_rows(abs_row)
+        self._rows.clear()
+        self._first_row = abs_row
+
+    def _row(self, abs_row):
+        if self._row_iter is None or abs_row < self._first_row:
+            self._restart(abs_row)
+        while abs_row >= self._first_row + len(self._rows):
+            row = next(self._row_iter, None)
+            if row is None:
+                return ()
+            self._rows.append(row)
+            if len(self._rows) > self.window:
+                self._rows.popleft()
+                self._first_row += 1
+        return self._rows[abs_row - self._first_row]
+
+    def _cell(self, abs_row, abs_col):
+        try:
+            return self._row(abs_row)[abs_col - 1]
+        except IndexError:
+            return openpyxl.cell.read_only.EMPTY_CELL
 
-    def has_borders(self, mask):
-        if self._cell is None:
-            return False
-        return super(EmptyCell).has_borders(mask)
+    def cell(self, row, col):
+        abs_row = self.top + row
+        abs_col = self.left + col
+        anchor = self.merged.get((abs_row, abs_col))
+        is_merged = anchor is not None
+        if is_merged:
+            abs_row, abs_col = anchor
+            cell = self._anchors.get((abs_row, abs_col))
+            if cell is None:
+                cell = self._anchors[abs_row, abs_col] = self._cell(abs_row, abs_col)
+        else:
+            cell = self._cell(abs_row, abs_col)
+        formatting = None
+        if self.workbook.with_formatting:
+            formatting = self.workbook.get_formatting(
+                getattr(cell, '_style_id', 0))
+        return opxlCell(cell.value, formatting, is_merged)
+
+    def close(self):
+        """closes the rows being read, which keep the file open"""
+        if self._row_iter is not None:
+            self._row_iter.close()
+            self._row_iter = None
+
+    def __repr__(self):
+        return "<opxlStreamingSheet %s>" % self.name
 
 
 class opxlExcelSheet(SheetDocument, CellRange):
-    def __init__(self, wksheet_data, wksheet_fmt=None):
-        self.name = wksheet_data.title
-        self.wksheet_data = wksheet_data
-        self.wksheet_fmt = wksheet_fmt
-        self.merged = {}
-        self.hidden_rows = {}
-        if self.wksheet_fmt:
-            for crange in self.wksheet_fmt.merged_cell_ranges:
-                clo, rlo, chi, rhi = openpyxl.utils.range_boundaries(str(crange))
-                for rowx in range(rlo, rhi + 1):
-                    for colx in range(clo, chi + 1):
-                        if (rlo, clo) != (rowx, colx):
-                            self.merged[rowx, colx] = (rlo, clo)
+    """A sheet read in a single pass into a snapshot: the cached values
+    are kept row by row in `data` (each row stops at its last value)
+    and the style ids, when not the default style, in `styles`. The
+    merged cells and the hidden rows are kept too. Reading a cell
+    doesn't create anything in the workbook, the writable sheet is
+    only loaded if a cell is written back."""
+
+    def __init__(self, workbook, wksheet):
+        self.name = wksheet.title
+        self.workbook = workbook
+        self.wksheet = wksheet
+        self.data = []
+        self.styles = {}
+        self.merged = MergedCells()
+        book = wksheet.parent
+        source = wksheet._get_source()
+        try:
+            parser = WorkSheetParser(source, wksheet._shared_strings,
+                                     data_only=True, epoch=book.epoch,
+                                     date_formats=book._date_formats,
+                                     timedelta_formats=book._timedelta_formats)
+            max_row = max_col = 1
+            for rowx, cells in parser.parse():
+                if not cells:
+                    continue
+                max_row = max(max_row, rowx)
+                values = [None] * max(cell['column'] for cell in cells)
+                max_col = max(max_col, len(values))
+                for cell in cells:
+                    values[cell['column'] - 1] = cell['value']
+                    if cell['style_id']:
+                        self.styles[cell['row'], cell['column']] = cell['style_id']
+                while values and values[-1] is None:
+                    values.pop()
+                if not values:
+                    continue
+                if rowx > len(self.data):
+                    self.data.extend([()] * (rowx - len(self.data) - 1))
+                    self.data.append(tuple(values))
+                else:
+                    self.data[rowx - 1] = tuple(values)
+        finally:
+            source.close()
+        self.hidden_rows = {int(rowx) for rowx, attrs in parser.row_dimensions.items()
+                            if attrs.get('hidden') in ('1', 'true')}
+        if workbook.with_formatting and parser.merged_cells:
+            self.merged = MergedCells(_merged_ranges(
+                crange.ref for crange in parser.merged_cells.mergeCell))
         self.top, self.left = 1, 1  # wksheet.min_row, wksheet.min_column
-        self.bottom = wksheet_data.max_row + 1
-        self.right = wksheet_data.max_column + 1
+        self.bottom = max_row + 1
+        self.right = max_col + 1
+
+    @property
+    def wksheet_fmt(self):
+        return self.workbook.wbk_fmt[self.name]
 
     def is_hidden(self):
-        return self.wksheet_data.sheet_state != SHEETSTATE_VISIBLE
+        return self.wksheet.sheet_state != SHEETSTATE_VISIBLE
 
     def is_hidden_row(self, rowidx):
-        return self.wksheet_fmt.row_dimensions[rowidx + 1].hidden
+        return rowidx + 1 in self.hidden_rows
 
     def cell(self, row, col):
         abs_row = self.top + row
         abs_col = self.left + col
-        is_merged = False
-        if (abs_row, abs_col) in self.merged:
-            is_merged = True
-            abs_row, abs_col = self.merged[abs_row, abs_col]
+        anchor = self.merged.get((abs_row, abs_col))
+        is_merged = anchor is not None
+        if is_merged:
+            abs_row, abs_col = anchor
+        formatting = None
+        if self.workbook.with_formatting:
+            formatting = self.workbook.get_formatting(
+                self.styles.get((abs_row, abs_col), 0))
         try:
-            return opxlCell(
-                self.wksheet_data.cell(row=abs_row, column=abs_col).value,
-                (self.wksheet_fmt.cell(row=abs_row, column=abs_col)
-                 if self.wksheet_fmt else None),
-                self.wksheet_fmt, is_merged)
+            value = self.data[abs_row - 1][abs_col - 1]
         except IndexError:
-            return EmptyCell(row, col, self.wksheet_fmt)
+            value = None
+        return opxlCell(value, formatting, is_merged, self, abs_row, abs_col)
 
     def __repr__(self):
         return "<opxlExcelSheet %s>" % self.name
 
 
 class opxlExcelWorkbook(WorkbookDocument):
-    """A class to open workbooks and obtain sheets"""
+    """A class to open workbooks and obtain sheets. The workbook is
+    opened read-only, its sheets are read into snapshots and the file
+    is closed. With `read_only`, the sheets are read row by row (see
+    :class:`opxlStreamingSheet`) and cannot be written back: the file
+    stays open until `close`, or the end of a `with` block.
+
+    `wbk_fmt` is the writable workbook, loaded on first access, to
+    which the cells are written back by `get_cell`."""
+
+    def __init__(self, filename, with_formatting=True, read_only=False,
+                 window=ROW_WINDOW):
+        self.filename = filename
+        self.with_formatting = with_formatting
+        self.read_only = read_only
+        self.window = window
+        # the cached values and the styles come from the same
+        # workbook, the merged cells are read with the sheets
+        self.wbk = openpyxl.load_workbook(
+            filename=filename, read_only=True, data_only=True)
+        self._sheets = {}
+        self._formatting = {}
+        self._wbk_fmt = None
+        self._streams = weakref.WeakSet()
+        if not read_only:
+            for wksheet in self.wbk.worksheets:
+                self._sheets[wksheet.title] = opxlExcelSheet(self, wksheet)
+            self.wbk.close()
 
-    def __init__(self, filename, with_formatting=True):
-        # I'd like to open it readonly but then the merged cells
-        # are not loaded
-        if with_formatting:
-            self.wbk_fmt = openpyxl.load_workbook(filename=filename)
-        else:
-            self.wbk_fmt = None
-        # and we need the data too because cell values are the formulas!!
-        self.wbk_data = openpyxl.load_workbook(filename=filename, data_only=True)
+    @property
+    def wbk_fmt(self):
+        if self.read_only:
+            return None
+        if self._wbk_fmt is None:
+            self._wbk_fmt = openpyxl.load_workbook(filename=self.filename)
+        return self._wbk_fmt
+
+    def get_formatting(self, style_id):
+        """returns the Formatting of a style id, shared by all cells"""
+        formatting = self._formatting.get(style_id)
+        if formatting is None:
+            formatting = self._formatting[style_id] = Formatting(self.wbk, style_id)
+        return formatting
 
     def __iter__(self):
-        return (self[s] for s in self.wbk_data.sheetnames)
+        return (self[s] for s in self.wbk.sheetnames)
 
     def __getitem__(self, name_or_id):
-        if isinstance(name_or_id, str):
-            return opxlExcelSheet(self.wbk_data[name_or_id],
-                                  self.wbk_fmt[name_or_id]
-                                  if self.wbk_fmt else None)
-        else:
-            return opxlExcelSheet(self.wbk_data.worksheets[id],
-                                  self.wbk_fmt.worksheets[id]
-                                  if self.wbk_fmt else None)
+        wksheet = (self.wbk[name_or_id] if isinstance(name_or_id, str)
+                   else self.wbk.worksheets[name_or_id])
+        if self.read_only:
+            sheet = opxlStreamingSheet(self, wksheet)
+            self._streams.add(sheet)
+            return sheet
+        return self._sheets[wksheet.title]
+
+    def close(self):
+        """Releases the file kept open by a read-only workbook"""
+        for sheet in list(self._streams):
+            sheet.close()
+        self.wbk.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, etype, evalue, tb):
+        self.close()
 
 
 load_workbook = opxlExcelWorkbook
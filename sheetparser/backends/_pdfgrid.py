@@ -0,0 +1,174 @@
+"""Reads the tables of machine-generated pdf files from the positions
+of their characters, without the layout analysis of pdfminer. The
+characters of a page are gathered in arrays and the rows, the cells
+and the columns are found with vectorized operations:
+
+- the rows are the groups of characters whose middles are close, from
+  the top of the page, and an empty row is added where the space
+  between two rows is more than 1.5 times the usual one, as with
+  `PdfTable`;
+- the cells are the runs of characters of a row that overlap
+  vertically and are less than `char_margin` character widths apart,
+  with a space where they are more than `word_margin` apart (the
+  LAParams defaults, as for the text lines of pdfminer);
+- the columns are the groups of cells whose horizontal extents overlap.
+
+It suits regular tables: a cell that spans several columns, such as a
+title, doesn't merge them but is put in the first one.
+
+    wbk = load_workbook('statement.pdf', grid=True)
+"""
+
+import numpy as np
+
+from pdfminer.converter import PDFLayoutAnalyzer
+from pdfminer.layout import LAParams, LTChar
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+
+from ._pdfminer import TextAnalyzer, open_document
+
+LAPARAMS = LAParams()
+CHAR_MARGIN = LAPARAMS.char_margin
+WORD_MARGIN = LAPARAMS.word_margin
+LINE_OVERLAP = LAPARAMS.line_overlap
+ROW_TOLERANCE = 0.5  # in median character heights
+EMPTY_ROW_GAP = 1.5  # in median row spacings
+
+
+class CharCollector(PDFLayoutAnalyzer):
+    """keeps the boxes and the texts of the characters of the last
+    page, out of the figures"""
+
+    handle_undefined_char = TextAnalyzer.handle_undefined_char
+
+    def __init__(self, rsrcmgr):
+        PDFLayoutAnalyzer.__init__(self, rsrcmgr, laparams=None)
+        self.boxes = []
+        self.texts = []
+
+    def receive_layout(self, ltpage):
+        self.boxes, self.texts = [], []
+        for item in ltpage:
+            if isinstance(item, LTChar) and not item.get_text().isspace():
+                self.boxes.append((item.x0, item.y0, item.x1, item.y1))
+                self.texts.append(item.get_text())
+
+
+def _row_ids(y0, y1):
+    """the row of each character, from 0 at the top, with the empty
+    rows counted"""
+    middle = (y0 + y1) / 2
+    order = np.argsort(-middle, kind='stable')
+    gaps = -np.diff(middle[order])
+    breaks = gaps > ROW_TOLERANCE * np.median(y1 - y0)
+    steps = np.ones(breaks.sum(), dtype=int)
+    if len(steps) >= 2:
+        # the space between the middles of consecutive rows
+        spacings = gaps[breaks]
+        spacing = np.sort(spacings)[len(spacings) // 2]
+        steps = np.where(spacings > EMPTY_ROW_GAP * spacing,
+                         np.round(spacings / spacing), 1).astype(int)
+    rows = np.zeros(len(order), dtype=int)
+    rows[1:][breaks] = steps
+    result = np.empty_like(rows)
+    result[order] = np.cumsum(rows)
+    return result
+
+
+def _column_ids(x0, x1, rows):
+    """the column of each cell. The columns are the groups of cells
+    whose extents overlap; a cell that joins two cells of a row in a
+    column, such as a title over several columns, is left out of the
+    groups and put in the first column that it overlaps"""
+    grouped = np.ones(len(x0), dtype=bool)
+    while True:
+        # the grouped cells sorted by left side: a new column starts
+        # where a cell is right of all the cells before
+        by_left = np.flatnonzero(grouped)
+        by_left = by_left[np.argsort(x0[by_left], kind='stable')]
+        reach = np.maximum.accumulate(x1[by_left])
+        new_column = np.concatenate(([True], x0[by_left][1:] > reach[:-1]))
+        lefts = x0[by_left][new_column]
+        rights = reach[np.append(np.flatnonzero(new_column)[1:] - 1, -1)]
+        columns = np.where(grouped, np.searchsorted(lefts, x0, side='right') - 1,
+                           np.searchsorted(rights, x0, side='right'))
+        columns = np.minimum(columns, len(lefts) - 1)
+        # the columns where a row has more than one grouped cell
+        keys = (rows * len(lefts) + columns)[grouped]
+        keys, counts = np.unique(keys, return_counts=True)
+        shared = keys[counts > 1] % len(lefts)
+        if not len(shared):
+            return columns
+        # the widest cell of each of those columns is left out
+        candidates = np.flatnonzero(grouped & np.isin(columns, shared))
+        order = candidates[np.lexsort((x0[candidates] - x1[candidates],
+                                       columns[candidates]))]
+        widest = np.concatenate(([True], np.diff(columns[order]) != 0))
+        grouped[order[widest]] = False
+
+
+def text_grid(boxes, texts):
+    """the table of a page and the boxes of its cells, from the (x0,
+    y0, x1, y1) boxes and the texts of its characters"""
+    if not texts:
+        return [], []
+    x0, y0, x1, y1 = np.asarray(boxes, dtype=float).T
+    rows = _row_ids(y0, y1)
+    order = np.lexsort((x0, rows))
+    rows, x0, y0, x1, y1 = rows[order], x0[order], y0[order], x1[order], y1[order]
+    texts = np.asarray(texts, dtype=object)[order]
+    width, height = x1 - x0, y1 - y0
+    gaps = x0[1:] - x1[:-1]
+    overlaps = np.minimum(y1[1:], y1[:-1]) - np.maximum(y0[1:], y0[:-1])
+    new_cell = ((rows[1:] != rows[:-1]) |
+                (overlaps <= LINE_OVERLAP * np.minimum(height[1:], height[:-1])) |
+                (gaps > CHAR_MARGIN * np.maximum(width[1:], width[:-1])))
+    spaced = ~new_cell & (gaps > WORD_MARGIN * np.maximum(width[1:], height[1:]))
+    texts[1:][spaced] = ' ' + texts[1:][spaced]
+    starts = np.concatenate(([0], np.flatnonzero(new_cell) + 1))
+    cell_rows = rows[starts]
+    cell_x0 = np.minimum.reduceat(x0, starts)
+    cell_x1 = np.maximum.reduceat(x1, starts)
+    cell_y0 = np.minimum.reduceat(y0, starts)
+    cell_y1 = np.maximum.reduceat(y1, starts)
+    cell_columns = _column_ids(cell_x0, cell_x1, cell_rows)
+    width = cell_columns.max() + 1
+    table = [[''] * width for __ in range(rows[-1] + 1)]
+    boxes = [[None] * width for __ in range(rows[-1] + 1)]
+    for row, column, text, box in zip(
+            cell_rows.tolist(), cell_columns.tolist(), np.split(texts, starts[1:]),
+            zip(cell_x0.tolist(), cell_y0.tolist(), cell_x1.tolist(), cell_y1.tolist())):
+        table[row][column] += ''.join(text)
+        other = boxes[row][column]
+        if other is not None:
+            box = (min(box[0], other[0]), min(box[1], other[1]),
+                   max(box[2], other[2]), max(box[3], other[3]))
+        boxes[row][column] = box
+    return table, boxes
+
+
+def iter_grid(fp, password='', *page_numbers):
+    """yields the (page number, table, boxes of the cells) of the pages
+    of a pdf file, read as text grids. With `page_numbers`, only those
+    pages are read."""
+    document = open_document(fp, password)
+    rsrcmgr = PDFResourceManager(caching=True)
+    device = CharCollector(rsrcmgr)
+    interpreter = PDFPageInterpreter(rsrcmgr, device)
+    wanted = set(page_numbers)
+    try:
+        for pageno, page in enumerate(PDFPage.create_pages(document), 1):
+            if wanted and pageno not in wanted:
+                continue
+            interpreter.process_page(page)
+            yield (pageno,) + text_grid(device.boxes, device.texts)
+    finally:
+        device.close()
+
+
+def read_grid(fp, password='', *page_numbers):
+    """returns the tables of the pages of a pdf file read as text
+    grids, by page number (from 1)"""
+    return {pageno: table for pageno, table, __
+            in iter_grid(fp, password, *page_numbers)}
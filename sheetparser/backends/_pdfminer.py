@@ -1,8 +1,22 @@
+import argparse
 import bisect
+import collections
+import concurrent.futures
+import contextlib
 import functools
+import glob
+import hashlib
+import io
+import itertools
+import json
 import logging
+import math
+import os
 import re
+import shutil
 import sys
+import tempfile
+import time
 
 from pdfminer.converter import TextConverter
 from pdfminer.layout import (LAParams, LTContainer,
@@ -14,12 +28,17 @@ from pdfminer.pdfpage import PDFPage
 from pdfminer.pdfparser import PDFParser
 
 from . import _array
+from ..documents import CellRange, WorkbookDocument
+from ..utils import ConfigurationError, open_source
 
 MARGIN = 1
 MIN_INTERSECT = 4
 PAD = ' '
 CHAR_SIZE = 4.7
 RE_LONG_SPACES = re.compile('(  +)')
+CACHE_VERSION = 2
+BUCKET_SIZE = 50  # the side of the buckets of a CellIndex, in points
+HASH_CHUNK_SIZE = 1 << 20
 
 
 @functools.total_ordering
@@ -103,11 +122,14 @@ class Position:
 
 @functools.total_ordering
 class TextFrame(object):
+    """A text and its position. A part of a line keeps the position of
+    the line to its right; `right` is the right side of its text."""
     char_size = CHAR_SIZE
 
-    def __init__(self, position, text):
+    def __init__(self, position, text, right=None):
         self.position = position
         self.text = text
+        self.right = position.x1 if right is None else right
 
     def split_vertical(self):
         lines = self.text.split('\n')
@@ -133,7 +155,7 @@ class TextFrame(object):
                 x1 = x0 + char_size * len(t)
                 tpos = Position(x0, self.position.y0,
                                 self.position.x1, self.position.y1)
-                yield TextFrame(tpos, t)
+                yield TextFrame(tpos, t, x1)
                 x0 = x1 + char_size * len(next(sub_text))  # for spaces
         except StopIteration:
             pass
@@ -170,8 +192,7 @@ class AlignedTextFrame(object):
     def append_frame(self, text_frame):
         for tf in text_frame.split_horizontal():
             if not tf.is_empty():
-                self.frames.append(tf)
-        self.frames.sort()
+                bisect.insort(self.frames, tf)
 
     def merge(self, aligned):
         new_interval = self.interval | aligned.interval
@@ -191,37 +212,43 @@ class AlignedTextFrame(object):
 
 
 class Page(object):
+    """The lines of text of a page, from top to bottom. A frame joins
+    the line it overlaps most among the lines before the first line
+    that is entirely below it, or starts a new line there.
+
+    The lines are found by bisection in the running minimums of the
+    bottoms and the tops of the lines (negated to be increasing): a
+    new line is always inserted before a line lower than itself, so
+    the minimums after it don't change."""
+
     def __init__(self):
         self.aligned_frames = []
+        self._min_bottoms = []
+        self._min_tops = []
 
     def add_frame(self, frame):
         if not frame.text.strip():
             return
-        candidates = []
-        insert = False
-        if not self.aligned_frames:
-            self.aligned_frames.append(
-                AlignedTextFrame(frame.position.y_int, [frame]))
-            return
-        i = 0
-        for i in range(len(self.aligned_frames)):
-            line = self.aligned_frames[i]
+        y_int = frame.position.y_int
+        # the first line entirely below the frame
+        end = bisect.bisect_right(self._min_bottoms, -y_int.a)
+        # the lines before start are entirely above the frame
+        start = bisect.bisect_right(self._min_tops, -y_int.b, 0, end)
+        best, best_line = 0, None
+        for line in self.aligned_frames[start:end]:
             alignment = line.is_aligned(frame)
-            if alignment:
-                candidates.append((alignment, line))
-            if frame.position.y_int > line.interval:
-                insert = True
-                break
-        if not candidates:
-            if insert:
-                self.aligned_frames.insert(i, AlignedTextFrame(
-                    frame.position.y_int, [frame]))
-            else:
-                self.aligned_frames.append(AlignedTextFrame(
-                    frame.position.y_int, [frame]))
+            if alignment and alignment >= best:
+                best, best_line = alignment, line
+        if best_line is not None:
+            best_line.append_frame(frame)
+            return
+        self.aligned_frames.insert(end, AlignedTextFrame(y_int, [frame]))
+        if end:
+            self._min_bottoms.insert(end, max(self._min_bottoms[end - 1], -y_int.b))
+            self._min_tops.insert(end, max(self._min_tops[end - 1], -y_int.a))
         else:
-            _, line = sorted(candidates)[-1]
-            line.append_frame(frame)
+            self._min_bottoms.insert(0, -y_int.b)
+            self._min_tops.insert(0, -y_int.a)
 
     def add_text(self, text_frame):
         for tf in text_frame.split_vertical():
@@ -231,6 +258,64 @@ class Page(object):
         self.x, self.y, self.w, self.h = mediabox
 
 
+class IntervalIndex(object):
+    """A list of intervals, searched by bisection on their bounds as
+    long as they are sorted and don't overlap. The order of the list
+    is kept as given: if the intervals overlap, the searches scan the
+    whole list, in order."""
+
+    def __init__(self, intervals=()):
+        self.intervals = list(intervals)
+        self._reindex()
+
+    def _reindex(self):
+        self.lefts = [interval.a for interval in self.intervals]
+        self.rights = [interval.b for interval in self.intervals]
+        self.is_sorted = all(left.b <= right.a for left, right
+                             in zip(self.intervals, self.intervals[1:]))
+
+    def _range(self, interval):
+        """the indices of the intervals that may intersect `interval`"""
+        if not self.is_sorted:
+            return range(len(self.intervals))
+        return range(bisect.bisect_right(self.rights, interval.a),
+                     bisect.bisect_left(self.lefts, interval.b))
+
+    def overlapping(self, interval):
+        """the indices of the intervals that intersect `interval`"""
+        return [i for i in self._range(interval)
+                if self.intervals[i] & interval]
+
+    def first_overlapping(self, interval):
+        """the index of the first interval that intersects `interval`,
+        or None"""
+        for i in self._range(interval):
+            if self.intervals[i] & interval:
+                return i
+        return None
+
+    def insort(self, interval):
+        """inserts an interval that intersects none of the others, at
+        the place `bisect.insort` puts it"""
+        i = bisect.bisect_right(self.intervals, interval)
+        self.intervals.insert(i, interval)
+        self.lefts.insert(i, interval.a)
+        self.rights.insert(i, interval.b)
+        if self.is_sorted:
+            self.is_sorted = ((i == 0 or self.rights[i - 1] <= interval.a) and
+                              (i + 1 == len(self.intervals) or
+                               interval.b <= self.lefts[i + 1]))
+
+    def restrict(self, i, interval):
+        """intersects the i-th interval with `interval`: the order of
+        sorted intervals is kept"""
+        self.intervals[i] &= interval
+        self.lefts[i], self.rights[i] = self.intervals[i].a, self.intervals[i].b
+
+    def __len__(self):
+        return len(self.intervals)
+
+
 class PdfTable(object):
     """receives aligned frames and build a 2d table, based
     on the calculation of tables and columns."""
@@ -240,6 +325,14 @@ class PdfTable(object):
         self._calculate_columns()  # build a list of columns
         self._calculate_rows()  # check for missing lines
 
+    @property
+    def columns(self):
+        return self._columns.intervals
+
+    @columns.setter
+    def columns(self, columns):
+        self._columns = IntervalIndex(columns)
+
     def _calculate_columns(self):
         if self.aligned_frames:
             self.columns = sorted(i.position.x_int
@@ -252,13 +345,12 @@ class PdfTable(object):
     def _add_row(self, row):
         for cell in row:
             # what are the columns that intersect this cell
-            ids = [i for i, col in enumerate(self.columns)
-                   if col & cell.position.x_int]
+            ids = self._columns.overlapping(cell.position.x_int)
             if len(ids) == 0:  # there's none: new columnn
-                bisect.insort(self.columns, cell.position.x_int)
+                self._columns.insort(cell.position.x_int)
             else:  # there's at least one: restrict existing
                 for i in ids:
-                    self.columns[i] &= cell.position.x_int
+                    self._columns.restrict(i, cell.position.x_int)
 
     def _calculate_rows(self):
         #  the the middle y of aligned frames
@@ -289,13 +381,32 @@ class PdfTable(object):
             row = [''] * len(self.columns)
             if aligned_frame is not None:
                 for frame in aligned_frame.frames:
-                    for i, col in enumerate(self.columns):
-                        if col & frame.position.x_int:
-                            row[i] += str(frame.text)
-                            break
+                    i = self._columns.first_overlapping(frame.position.x_int)
+                    if i is not None:
+                        row[i] += str(frame.text)
             table.append(row)
         return table
 
+    def get_boxes(self):
+        """the boxes (x0, y0, x1, y1) of the cells of `get_table`,
+        around their texts; None for the empty cells"""
+        boxes = []
+        for aligned_frame in self.aligned_frames:
+            row = [None] * len(self.columns)
+            if aligned_frame is not None:
+                for frame in aligned_frame.frames:
+                    i = self._columns.first_overlapping(frame.position.x_int)
+                    if i is None:
+                        continue
+                    position = frame.position
+                    box = (position.x0, position.y0, frame.right, position.y1)
+                    if row[i] is not None:
+                        box = (min(box[0], row[i][0]), min(box[1], row[i][1]),
+                               max(box[2], row[i][2]), max(box[3], row[i][3]))
+                    row[i] = box
+            boxes.append(row)
+        return boxes
+
     def merge_margin(self, small_col=15, margin=5):
         result = []
         for col in self.columns:
@@ -310,6 +421,56 @@ class PdfTable(object):
         return self
 
 
+class CellIndex(object):
+    """A spatial index of the boxes of the cells of a page. The page
+    is cut in square buckets of `bucket_size` points, and a cell is
+    listed in every bucket that its box covers: a query only tests the
+    cells of the buckets that it covers."""
+
+    def __init__(self, boxes, bucket_size=BUCKET_SIZE):
+        self.bucket_size = bucket_size
+        self.boxes = {}
+        self.buckets = collections.defaultdict(list)
+        for row, line in enumerate(boxes):
+            for col, box in enumerate(line):
+                if box is not None:
+                    self.boxes[row, col] = tuple(box)
+        self.bounds = None
+        if self.boxes:
+            x0s, y0s, x1s, y1s = zip(*self.boxes.values())
+            self.bounds = (min(x0s), min(y0s), max(x1s), max(y1s))
+        for cell, box in self.boxes.items():
+            for key in self._keys(*box):
+                self.buckets[key].append(cell)
+
+    def _keys(self, x0, y0, x1, y1):
+        size = self.bucket_size
+        return itertools.product(range(int(x0 // size), int(x1 // size) + 1),
+                                 range(int(y0 // size), int(y1 // size) + 1))
+
+    def query(self, x0, y0, x1, y1, inside=False):
+        """the (row, col) of the cells whose box intersects the given
+        box, or with `inside` lies in it, sorted. The bounds may be
+        infinite."""
+        if self.bounds is None:
+            return []
+        # only the buckets of the cells are looked up
+        bx0, by0, bx1, by1 = self.bounds
+        qx0, qy0, qx1, qy1 = max(x0, bx0), max(y0, by0), min(x1, bx1), min(y1, by1)
+        if qx0 > qx1 or qy0 > qy1:
+            return []
+        found = set()
+        for key in self._keys(qx0, qy0, qx1, qy1):
+            for cell in self.buckets.get(key, ()):
+                cx0, cy0, cx1, cy1 = self.boxes[cell]
+                if inside:
+                    if x0 <= cx0 and cx1 <= x1 and y0 <= cy0 and cy1 <= y1:
+                        found.add(cell)
+                elif cx0 <= x1 and x0 <= cx1 and cy0 <= y1 and y0 <= cy1:
+                    found.add(cell)
+        return sorted(found)
+
+
 class TextAnalyzer(TextConverter):
     def __init__(self, *args, **kwargs):
         TextConverter.__init__(self, *args, **kwargs)
@@ -358,7 +519,7 @@ class TextAnalyzer(TextConverter):
         return '(cid:%d)' % cid
 
 
-def read_pdf(fp, password='', *page_numbers):
+def open_document(fp, password=''):
     # Create a PDF parser object associated with the file object.
     parser = PDFParser(fp)
     # Create a PDF document object that stores the document structure.
@@ -367,42 +528,575 @@ def read_pdf(fp, password='', *page_numbers):
     # Check if the document allows text extraction. If not, abort.
     if not document.is_extractable:
         raise PDFTextExtractionNotAllowed
-    rsrcmgr = PDFResourceManager(caching=True)
+    return document
+
+
+def layout_params():
     laparams = LAParams()
     laparams.all_texts = False
-    device = TextAnalyzer(rsrcmgr, sys.stdout, laparams=laparams)
-    interpreter = PDFPageInterpreter(rsrcmgr, device)
-    # Process each page contained in the document.
-    for page in PDFPage.create_pages(document):
-        interpreter.process_page(page)
-    device.close()
-    return device.get_result()
+    return laparams
+
+
+def text_analyzer(rsrcmgr):
+    """returns a TextAnalyzer and the interpreter that feeds it"""
+    device = TextAnalyzer(rsrcmgr, sys.stdout, laparams=layout_params())
+    return device, PDFPageInterpreter(rsrcmgr, device)
+
+
+def _binary_file(source):
+    """opens a file name or the content of a file; a file object is
+    used as it is, and left open"""
+    if isinstance(source, bytes):
+        return io.BytesIO(source)
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, 'rb')
+    return contextlib.nullcontext(source)
+
+
+def dump_frames(aligned_frames):
+    return [[line.interval.a, line.interval.b, line.interval.margin,
+             [[tf.position.x0, tf.position.y0, tf.position.x1,
+               tf.position.y1, tf.text] for tf in line.frames]]
+            for line in aligned_frames]
+
+
+def load_frames(lines):
+    return [AlignedTextFrame(Interval(a, b, margin),
+                             [TextFrame(Position(x0, y0, x1, y1), text)
+                              for x0, y0, x1, y1, text in frames])
+            for a, b, margin, frames in lines]
+
+
+class LayoutCache(object):
+    """A directory keeping the tables of the pages of pdf files, and
+    with `with_frames` their lines of text (the `aligned_frames` of
+    the pages). An entry is found from the hash of the content of the
+    file, the page number, and the settings of the layout (LAParams,
+    MARGIN, CHAR_SIZE): a file read again with the same settings
+    isn't laid out again."""
+
+    def __init__(self, directory, digest, with_frames=False):
+        self.directory = directory
+        self.digest = digest
+        self.with_frames = with_frames
+        settings = sorted(vars(layout_params()).items())
+        settings += [('MARGIN', MARGIN), ('CHAR_SIZE', TextFrame.char_size),
+                     ('version', CACHE_VERSION)]
+        self.settings = hashlib.sha1(repr(settings).encode()).hexdigest()[:16]
+
+    @classmethod
+    def for_file(cls, directory, source, with_frames=False):
+        """the cache of a file name, file content or file object"""
+        digest = hashlib.sha256()
+        with _binary_file(source) as fp:
+            position = fp.tell()
+            fp.seek(0)
+            for chunk in iter(functools.partial(fp.read, HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+            fp.seek(position)
+        return cls(directory, digest.hexdigest(), with_frames)
+
+    def _path(self, pageno):
+        return os.path.join(self.directory, self.digest, self.settings,
+                            '%d.json' % pageno)
+
+    def get(self, pageno):
+        """the entry of a page: a dict with its `table`, the `boxes`
+        of its cells, and its `frames` if they are kept; None if the
+        page isn't cached"""
+        try:
+            with open(self._path(pageno), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self.with_frames and 'frames' not in entry:
+            return None
+        return entry
 
+    def get_frames(self, pageno):
+        """the aligned frames of a cached page, or None"""
+        entry = self.get(pageno)
+        if entry is None or 'frames' not in entry:
+            return None
+        return load_frames(entry['frames'])
+
+    def set(self, pageno, table, boxes, aligned_frames=None):
+        entry = {'table': table, 'boxes': boxes}
+        if self.with_frames and aligned_frames is not None:
+            entry['frames'] = dump_frames(aligned_frames)
+        path = self._path(pageno)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # written aside then renamed, for concurrent readers
+        temp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(temp_path, path)
+
+
+def layout_page(device, interpreter, pageno, page, cache=None):
+    """lays out a page with the device of `text_analyzer` and returns
+    its table and the boxes of its cells; the page is not kept by the
+    device"""
+    device.pageno = pageno
+    interpreter.process_page(page)
+    aligned_frames = device.pages.pop(pageno).aligned_frames
+    pdf_table = PdfTable(aligned_frames)
+    table, boxes = pdf_table.get_table(), pdf_table.get_boxes()
+    if cache is not None:
+        cache.set(pageno, table, boxes, aligned_frames)
+    return table, boxes
+
+
+def iter_pdf(fp, password='', *page_numbers, cache=None):
+    """yields the (page number, table, boxes of the cells) of the
+    pages of a pdf file as they are laid out. With `page_numbers`,
+    only those pages are read. The pages found in the `LayoutCache`
+    are not laid out, the others are added to it. The layout of a page
+    is not kept once its table is built."""
+    document = open_document(fp, password)
+    rsrcmgr = PDFResourceManager(caching=True)
+    device, interpreter = text_analyzer(rsrcmgr)
+    wanted = set(page_numbers)
+    try:
+        for pageno, page in enumerate(PDFPage.create_pages(document), 1):
+            if wanted and pageno not in wanted:
+                continue
+            entry = cache and cache.get(pageno)
+            if entry:
+                yield pageno, entry['table'], entry['boxes']
+                continue
+            table, boxes = layout_page(device, interpreter, pageno, page, cache)
+            yield pageno, table, boxes
+    finally:
+        device.close()
+
+
+def read_pdf(fp, password='', *page_numbers, cache=None):
+    """returns the tables of the pages of a pdf file, by page number
+    (from 1). With `page_numbers`, only those pages are read. The
+    pages found in the `LayoutCache` are not laid out, the others are
+    added to it"""
+    return {pageno: table for pageno, table, __
+            in iter_pdf(fp, password, *page_numbers, cache=cache)}
+
+
+def count_pages(fp, password=''):
+    return sum(1 for __ in PDFPage.create_pages(open_document(fp, password)))
+
+
+def _read_pages(source, password, page_numbers, cache):
+    """reads some pages of a file, or of the content of a file, in a
+    worker process"""
+    with _binary_file(source) as fp:
+        return list(iter_pdf(fp, password, *page_numbers, cache=cache))
+
+
+def iter_pdf_parallel(source, password='', workers=None, chunk_size=None,
+                      cache=None):
+    """yields the (page number, table, boxes of the cells) of the pages
+    of a pdf file, read with a pool of `workers` processes (one per
+    cpu by default). Each task reads `chunk_size` consecutive pages,
+    by default a quarter of a worker's share to balance the load.
+    `source` is a file name, or the content of the file that is sent
+    to the workers."""
+    workers = workers or os.cpu_count() or 1
+    with _binary_file(source) as fp:
+        page_count = count_pages(fp, password)
+    if not chunk_size:
+        chunk_size = max(1, -(-page_count // (4 * workers)))
+    page_numbers = range(1, page_count + 1)
+    chunks = [page_numbers[i:i + chunk_size]
+              for i in range(0, page_count, chunk_size)]
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        for pages in executor.map(_read_pages, itertools.repeat(source),
+                                  itertools.repeat(password), chunks,
+                                  itertools.repeat(cache)):
+            yield from pages
+
+
+def read_pdf_parallel(source, password='', workers=None, chunk_size=None,
+                      cache=None):
+    """returns the tables of the pages of a pdf file by page number,
+    read with a pool of processes, see `iter_pdf_parallel`"""
+    return {pageno: table for pageno, table, __ in iter_pdf_parallel(
+        source, password, workers, chunk_size, cache)}
+
+
+class PageGeometry(object):
+    """The positions of the cells of the sheets of the pdf backend, in
+    points from the bottom left of the page. `boxes` are the (x0, y0,
+    x1, y1) of the cells, by row and column, None for the empty cells.
+    The cells are found in a `CellIndex`, so a pattern can start from
+    a text and match the cells near it without reading every row:
+
+        row, col = sheet.find_text('Total assets')
+        rge = sheet.below(row, col)
+    """
+
+    @functools.cached_property
+    def index(self):
+        return CellIndex(self.boxes)
+
+    def cell_box(self, row, col):
+        """the box of a cell, or None if it is empty"""
+        return self.index.boxes.get((row, col))
+
+    def cells_in(self, x0, y0, x1, y1, inside=False):
+        """the (row, col) of the cells whose box intersects the given
+        box, or with `inside` lies in it"""
+        return self.index.query(x0, y0, x1, y1, inside)
+
+    def region(self, x0, y0, x1, y1, inside=False):
+        """the range of the cells found by `cells_in`, or None"""
+        cells = self.cells_in(x0, y0, x1, y1, inside)
+        if not cells:
+            return None
+        rows, cols = zip(*cells)
+        return CellRange(self, min(rows), min(cols), max(rows) + 1, max(cols) + 1)
+
+    def below(self, row, col):
+        """the range of the cells under a cell, on the whole width of
+        the page, or None"""
+        box = self.cell_box(row, col)
+        if box is None:
+            return None
+        return self.region(-math.inf, -math.inf, math.inf, box[1], inside=True)
 
-def load_workbook(fp, password='', with_formatting=False):
-    assert not with_formatting
-    if isinstance(fp, str):
-        with open(fp, 'rb') as f:
-            return _array.rawWorkbook(read_pdf(f, password))
-    else:
-        return _array.rawWorkbook(read_pdf(fp, password))
+    def find_text(self, text):
+        """the (row, col) of the first cell whose text is `text`,
+        spaces excluded, or None"""
+        for row, line in enumerate(self.data):
+            for col, value in enumerate(line):
+                if value.strip() == text:
+                    return row, col
+        return None
+
+
+class pdfTableSheet(PageGeometry, _array.rawSheet):
+    """A page of a pdf file already read: its table and the boxes of
+    its cells"""
 
+    def __init__(self, name, values, boxes):
+        super(pdfTableSheet, self).__init__(name, values)
+        self.boxes = boxes
 
-def pdf2excel(inputname, outputname):
+    def __repr__(self):
+        return "<pdfTableSheet %s>" % self.name
+
+
+class pdfTablesWorkbook(_array.rawWorkbook):
+    """The tables of the pages of a pdf file read at once, from the
+    (page number, table, boxes) of the pages"""
+
+    def __init__(self, pages):
+        self.data, self.boxes = {}, {}
+        for pageno, table, boxes in sorted(pages, key=lambda page: page[0]):
+            self.data[pageno] = table
+            self.boxes[pageno] = boxes
+
+    def __iter__(self):
+        return (pdfTableSheet(pageno, table, self.boxes[pageno])
+                for pageno, table in self.data.items())
+
+    def __getitem__(self, pageno):
+        return pdfTableSheet(pageno, self.data[pageno], self.boxes[pageno])
+
+    def close(self):
+        """the file was read at once: nothing is kept open"""
+
+
+class pdfSheet(PageGeometry, _array.rawSheet):
+    """A page of a `pdfWorkbook`, read when its cells are first
+    needed"""
+
+    def __init__(self, workbook, pageno):
+        self.workbook = workbook
+        self.name = pageno
+        self.top, self.left = (0, 0)
+
+    @property
+    def data(self):
+        return self.workbook.read_page(self.name)
+
+    @property
+    def boxes(self):
+        self.workbook.read_page(self.name)
+        return self.workbook.boxes[self.name]
+
+    @property
+    def bottom(self):
+        return len(self.data)
+
+    @property
+    def right(self):
+        return max((len(i) for i in self.data), default=0)
+
+    def __repr__(self):
+        return "<pdfSheet %s>" % self.name
+
+
+class pdfWorkbook(WorkbookDocument):
+    """A pdf file whose pages are read when they are used, and kept.
+    A pattern that names its pages only reads those pages. The file
+    stays open until `close`."""
+
+    def __init__(self, fp, password='', cache=None):
+        self._file = None
+        if isinstance(fp, (str, os.PathLike)):
+            fp = self._file = open(fp, 'rb')
+        self.fp = fp
+        self.document = open_document(fp, password)
+        self.pages = list(PDFPage.create_pages(self.document))
+        self.device, self.interpreter = text_analyzer(
+            PDFResourceManager(caching=True))
+        self.cache = cache
+        self.tables = {}
+        self.boxes = {}
+
+    def read_page(self, pageno):
+        table = self.tables.get(pageno)
+        if table is not None:
+            return table
+        entry = self.cache and self.cache.get(pageno)
+        if entry:
+            table, boxes = entry['table'], entry['boxes']
+        else:
+            table, boxes = layout_page(self.device, self.interpreter, pageno,
+                                       self.pages[pageno - 1], self.cache)
+        self.tables[pageno], self.boxes[pageno] = table, boxes
+        return table
+
+    @property
+    def data(self):
+        """the tables of all the pages"""
+        return {pageno: self.read_page(pageno)
+                for pageno in range(1, len(self.pages) + 1)}
+
+    def __iter__(self):
+        return (pdfSheet(self, pageno)
+                for pageno in range(1, len(self.pages) + 1))
+
+    def __getitem__(self, pageno):
+        if not 1 <= pageno <= len(self.pages):
+            raise KeyError(pageno)
+        return pdfSheet(self, pageno)
+
+    def __len__(self):
+        return len(self.pages)
+
+    def close(self):
+        self.device.close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class pdfStreamWorkbook(WorkbookDocument):
+    """A pdf file read in sequence: each page is laid out when the
+    iteration reaches it, and dropped when the iteration moves on, so
+    the memory used doesn't grow with the number of pages. Each
+    iteration reads the file again, and a page taken by number is read
+    on its own. With `grid`, the pages are read as text grids. The
+    file stays open until `close`."""
+
+    def __init__(self, fp, password='', cache=None, grid=False):
+        self._file = None
+        if isinstance(fp, (str, os.PathLike)):
+            fp = self._file = open(fp, 'rb')
+        self.fp = fp
+        self.password = password
+        self.cache = cache
+        self.grid = grid
+
+    def iter_pages(self, *page_numbers):
+        if self.grid:
+            from ._pdfgrid import iter_grid
+            return iter_grid(self.fp, self.password, *page_numbers)
+        return iter_pdf(self.fp, self.password, *page_numbers, cache=self.cache)
+
+    def __iter__(self):
+        for pageno, table, boxes in self.iter_pages():
+            yield pdfTableSheet(pageno, table, boxes)
+
+    def __getitem__(self, pageno):
+        for page in self.iter_pages(pageno):
+            return pdfTableSheet(*page)
+        raise KeyError(pageno)
+
+    def __len__(self):
+        return count_pages(self.fp, self.password)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def load_workbook(fp, password='', with_formatting=False, workers=1,
+                  lazy=False, stream=False, cache_dir=None, cache_frames=False,
+                  grid=False):
+    """reads a pdf file; with `workers` other than 1, the pages are
+    read by a pool of processes (None for one per cpu). With `lazy`,
+    the pages are only read when they are used, and with `stream`
+    they are read as the workbook is iterated and not kept. With
+    `cache_dir`, the tables of the pages, and their lines of text with
+    `cache_frames`, are kept in a `LayoutCache` in that directory.
+    With `grid`, the tables are built from the positions of the
+    characters, without the layout analysis (see `_pdfgrid`)"""
+    assert not with_formatting
+    if lazy and stream:
+        raise ConfigurationError("A workbook is either lazy or streamed")
+    if (lazy or stream) and workers != 1:
+        raise ConfigurationError("A lazy or streamed workbook is read in one process")
+    if grid and (lazy or workers != 1 or cache_dir is not None):
+        raise ConfigurationError("A text grid is read in one process, without cache")
+    if workers != 1 and not isinstance(fp, (str, os.PathLike)):
+        # the workers open a copy of the file rather than receiving
+        # its content with each task
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as f:
+            shutil.copyfileobj(open_source(fp), f)
+        try:
+            return load_workbook(f.name, password, with_formatting, workers,
+                                 cache_dir=cache_dir, cache_frames=cache_frames)
+        finally:
+            os.remove(f.name)
+    cache = None
+    if cache_dir is not None:
+        cache = LayoutCache.for_file(cache_dir, fp, cache_frames)
+    if lazy:
+        return pdfWorkbook(fp, password, cache)
+    if stream:
+        return pdfStreamWorkbook(fp, password, cache, grid)
+    if grid:
+        from ._pdfgrid import iter_grid
+        with _binary_file(fp) as f:
+            return pdfTablesWorkbook(iter_grid(f, password))
+    if workers != 1:
+        return pdfTablesWorkbook(iter_pdf_parallel(fp, password, workers,
+                                                   cache=cache))
+    with _binary_file(fp) as f:
+        return pdfTablesWorkbook(iter_pdf(f, password, cache=cache))
+
+
+def pdf2excel(inputname, outputname, password='', grid=False):
+    """writes the tables of a pdf file to an xlsx file, a sheet per
+    page. The pages are streamed to a write-only workbook, so the
+    memory used doesn't grow with the number of pages. Returns the
+    number of pages."""
     import openpyxl
 
-    with open(inputname, 'rb') as f:
-        wb = openpyxl.Workbook(write_only=True)
+    wb = openpyxl.Workbook(write_only=True)
+    pages = 0
+    try:
+        wbk = load_workbook(inputname, password, stream=True, grid=grid)
         try:
-            pages = load_workbook(f)
-            npages = [i.name for i in pages]
-            for i in range(min(npages), max(npages) + 1):
+            for sheet in wbk:
                 ws = wb.create_sheet()
-                for row in pages[i].data:
+                for row in sheet.data:
                     ws.append(row)
+                pages += 1
         finally:
-            wb.save(outputname)
+            wbk.close()
+    finally:
+        wb.save(outputname)
+    return pages
+
+
+Conversion = collections.namedtuple('Conversion',
+                                    'source target seconds pages error')
+
+
+def find_pdf_files(paths):
+    """the pdf files of a list of files, directories (searched
+    recursively) and glob patterns, in order and without repeats"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                files.extend(os.path.join(root, name) for name in sorted(names)
+                             if name.lower().endswith('.pdf'))
+        elif os.path.exists(path):
+            files.append(path)
+        else:
+            files.extend(sorted(glob.glob(path, recursive=True)))
+    return list(dict.fromkeys(files))
+
+
+def _convert(source, target, options):
+    """converts a file in a worker process; the errors are returned"""
+    start = time.perf_counter()
+    pages, error = 0, None
+    try:
+        pages = pdf2excel(source, target, **options)
+    except Exception as e:
+        error = '%s: %s' % (type(e).__name__, e)
+    return Conversion(source, target, time.perf_counter() - start, pages, error)
+
+
+def pdf2excel_batch(paths, output_dir=None, workers=None, **options):
+    """converts the pdf files found by `find_pdf_files` to xlsx files
+    in `output_dir`, or next to each pdf file, with a pool of
+    `workers` processes (one per cpu by default, 1 to convert in this
+    process). The options are passed to `pdf2excel`. Yields a
+    `Conversion` for each file, as they end: a file that fails has an
+    `error` and doesn't stop the others."""
+    sources = find_pdf_files(paths)
+    targets = [os.path.join(output_dir or os.path.dirname(source),
+                            os.path.splitext(os.path.basename(source))[0] + '.xlsx')
+               for source in sources]
+    if len(set(targets)) < len(targets):
+        raise ConfigurationError("Several pdf files have the same name in %s"
+                                 % output_dir)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    if workers == 1:
+        for source, target in zip(sources, targets):
+            yield _convert(source, target, options)
+        return
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(_convert, source, target, options)
+                   for source, target in zip(sources, targets)]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Converts pdf files to xlsx files, a sheet per page.')
+    parser.add_argument('paths', nargs='+',
+                        help='pdf files, directories or glob patterns; a pdf '
+                             'file and an xlsx file convert that file')
+    parser.add_argument('-o', '--output-dir',
+                        help='where the xlsx files are written, by default '
+                             'next to the pdf files')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='the number of processes, one per cpu by default')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--grid', action='store_true',
+                        help='read the pages as text grids')
+    args = parser.parse_args(argv)
+    options = {'password': args.password, 'grid': args.grid}
+    if len(args.paths) == 2 and args.paths[1].lower().endswith('.xlsx'):
+        pdf2excel(args.paths[0], args.paths[1], **options)
+        return 0
+    start = time.perf_counter()
+    failures = count = 0
+    for conversion in pdf2excel_batch(args.paths, args.output_dir,
+                                      args.workers, **options):
+        count += 1
+        if conversion.error:
+            failures += 1
+            print('FAILED %7.2fs %s: %s' % (conversion.seconds, conversion.source,
+                                            conversion.error))
+        else:
+            print('ok     %7.2fs %s (%d pages) -> %s' % (
+                conversion.seconds, conversion.source, conversion.pages,
+                conversion.target))
+    print('%d files converted, %d failed, in %.2fs'
+          % (count - failures, failures, time.perf_counter() - start))
+    return 1 if failures else 0
 
 
 if __name__ == '__main__':
-    pdf2excel(sys.argv[1], sys.argv[2])
+    sys.exit(main())
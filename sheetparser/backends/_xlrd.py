@@ -2,64 +2,128 @@
 the engine. Can read xls with formatting, or xlsx without
 formatting."""
 import datetime
+import mmap
+import os
 
 import six
 import xlrd
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 from ..documents import (BORDER_TOP, BORDER_LEFT,
                          BORDER_BOTTOM, BORDER_RIGHT,
-                         CellRange, SheetDocument, WorkbookDocument)
+                         CellRange, LineData, MergedCells, SheetDocument,
+                         WorkbookDocument)
+from ..utils import file_contents
+
+EMPTY_TYPES = (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK)
+
+# day 0 of the 1900 and 1904 date systems, and the first day xlrd
+# refuses to convert
+XLDATE_EPOCHS = ('1899-12-30', '1904-01-01')
+XLDAYS_TOO_LARGE = (2958466, 2958466 - 1462)
+
+
+class BorrowedBuffer(object):
+    """the mmap of the caller, sliced by xlrd: xlrd closes the mmap
+    it reads, and this one isn't ours to close"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        return self.data[index]
+
+
+def xldate_value(value, datemode):
+    """converts the value of a date cell to a datetime, or a time if
+    there is no date part"""
+    datetuple = xlrd.xldate_as_tuple(value, datemode)
+    if any(datetuple[:3]):
+        return datetime.datetime(*datetuple)
+    else:
+        return datetime.time(*datetuple[3:])
+
+
+def xldate_values(values, datemode):
+    """converts a list of date cell values at once. Returns a list
+    with a datetime or a time for each value, or None where xlrd
+    would raise an error (negative, ambiguous or too large dates):
+    these are left to `xldate_value`"""
+    if numpy is None:
+        result = []
+        for value in values:
+            try:
+                result.append(xldate_value(value, datemode))
+            except xlrd.xldate.XLDateError:
+                result.append(None)
+        return result
+    xldates = numpy.asarray(values, dtype=numpy.float64)
+    days = numpy.floor(xldates)
+    # rounds half to even, like xlrd
+    seconds = (days.astype(numpy.int64) * 86400 +
+               numpy.round((xldates - days) * 86400.0).astype(numpy.int64))
+    days, daytime = numpy.divmod(seconds, 86400)
+    invalid = (xldates < 0) | (days >= XLDAYS_TOO_LARGE[datemode])
+    if datemode == 0:
+        invalid |= (days > 0) & (days < 61)
+    timestamps = (numpy.datetime64(XLDATE_EPOCHS[datemode], 's') +
+                  numpy.where(invalid, 0, seconds).astype('timedelta64[s]'))
+    result = timestamps.tolist()
+    for i in numpy.flatnonzero(invalid):
+        result[i] = None
+    for i in numpy.flatnonzero((days == 0) & ~invalid):
+        result[i] = result[i].time()
+    return result
 
 
 class xlrdCell(object):
-    def __init__(self, cell, wksheet, is_merged):
+    def __init__(self, cell, wksheet, is_merged, xf_table=None, date=None):
         self._cell = cell
         self._wksheet = wksheet
-        self._xf_cell = None
+        self._xf_table = xf_table
+        self._date = date
         self.is_merged = is_merged
 
     @property
     def value(self):
-        if self._cell.ctype == 3:  # it's a date!
-            datetuple = xlrd.xldate_as_tuple(self._cell.value,
-                                             self._wksheet.book.datemode)
-            if any(datetuple[:3]):
-                return datetime.datetime(*datetuple)
-            else:
-                return datetime.time(*datetuple[3:])
+        if self._cell.ctype == xlrd.XL_CELL_DATE:
+            if self._date is None:
+                self._date = xldate_value(self._cell.value,
+                                          self._wksheet.book.datemode)
+            return self._date
         return self._cell.value
 
     @property
     def _ctype(self):
         return self._cell.ctype
 
-    @property
-    def formatting(self):
-        if self._xf_cell is None:
-            self._xf_cell = XfCell(self._cell.xf_index, self._wksheet)
-        return self._xf_cell
-
     @property
     def is_empty(self):
-        return (self._ctype == xlrd.XL_CELL_EMPTY or
-                self._ctype == xlrd.XL_CELL_BLANK or
+        return (self._ctype in EMPTY_TYPES or
                 (self._ctype == xlrd.XL_CELL_TEXT and
                  self.value.strip() == ''))
 
     def has_borders(self, mask):
-        return bool(self.border_mask & mask)
+        return bool(self._xf_table.border_masks[self._cell.xf_index] & mask)
 
     @property
     def border_mask(self):
-        return self.formatting.border_mask
+        return self._xf_table.border_masks[self._cell.xf_index]
 
     @property
     def fill(self):
-        return self.formatting.fill
+        return self._xf_table.fills[self._cell.xf_index]
 
     @property
     def is_filled(self):
-        return self.formatting.is_filled
+        return self._xf_table.filled[self._cell.xf_index]
 
 
 class Fill(object):
@@ -70,8 +134,8 @@ class Fill(object):
         self.type = 'patternFill'  # xlrd + formatting --> .xls, only supports patterns
         self.pattern = self.PATTERN.get(xf_record.background.fill_pattern)
         if self.pattern is not None:
-            self.color1 = book.colour_map[xf_record.background.pattern_colour_index]
-            self.color2 = book.colour_map[xf_record.background.background_colour_index]
+            self.color1 = book.colour_map.get(xf_record.background.pattern_colour_index)
+            self.color2 = book.colour_map.get(xf_record.background.background_colour_index)
         else:
             self.color1 = None
             self.color2 = None
@@ -80,51 +144,98 @@ class Fill(object):
         return "<Fill %s %s %s %s>" % (self.type, self.pattern, self.color1, self.color2)
 
 
-class XfCell(object):
-    def __init__(self, xf_index, wksheet):
-        self._wksheet = wksheet
-        self._xf_record = wksheet.book.xf_list[xf_index]
-        self._borders = None
-        self._fill = None
+class XfTable(object):
+    """The formatting of all the xf records of a workbook, computed
+    once: the border masks, fills and filled flags are lists indexed
+    by the cells xf_index"""
+
+    def __init__(self, book):
+        self.border_masks = []
+        self.fills = []
+        self.filled = []
+        for xf_record in book.xf_list:
+            border = xf_record.border
+            self.border_masks.append(
+                (BORDER_TOP * (border.top_line_style != 0)) |
+                (BORDER_LEFT * (border.left_line_style != 0)) |
+                (BORDER_BOTTOM * (border.bottom_line_style != 0)) |
+                (BORDER_RIGHT * (border.right_line_style != 0)))
+            fill = Fill(xf_record, book)
+            self.fills.append(fill)
+            self.filled.append(fill.type != 'patternFill' or fill.pattern is not None)
+
+
+class xlrdExcelSheet(SheetDocument, CellRange):
+    """A sheet of the workbook, loaded when its cells are first
+    needed. `release` unloads it from an on-demand workbook; it is
+    loaded again if it is used after that.
+
+    The date cells of the sheet are converted together the first time
+    one of them is read, and kept in `dates`."""
+
+    def __init__(self, book, index, xf_table=None):
+        self.name = book.sheet_names()[index]
+        self.book = book
+        self.index = index
+        self.xf_table = xf_table
+        self.top, self.left = 0, 0
+        self._wksheet = None
+        self._merged = None
+        self._dates = None
 
     @property
-    def border_mask(self):
-        if self._borders is None:
-            border = self._xf_record.border
-            self._borders = ((BORDER_TOP * (border.top_line_style != 0)) |
-                             (BORDER_LEFT * (border.left_line_style != 0)) |
-                             (BORDER_BOTTOM * (border.bottom_line_style != 0)) |
-                             (BORDER_RIGHT * (border.right_line_style != 0)))
-        return self._borders
+    def wksheet(self):
+        if self._wksheet is None:
+            self._wksheet = self.book.sheet_by_index(self.index)
+            self._merged = MergedCells(self._wksheet.merged_cells)
+        return self._wksheet
 
     @property
-    def fill(self):
-        if self._fill is None:
-            self._fill = Fill(self._xf_record, self._wksheet.book)
-        return self._fill
+    def merged(self):
+        self.wksheet
+        return self._merged
+
+    def release(self):
+        if self._wksheet is not None and self.book.on_demand:
+            self.book.unload_sheet(self.index)
+            self._wksheet = None
+            self._dates = None
 
     @property
-    def is_filled(self):
-        return self.fill.type != 'patternFill' or self.fill.pattern is not None
+    def dates(self):
+        """the converted values of the date cells, by (row, col)"""
+        if self._dates is None:
+            wksheet = self.wksheet
+            coordinates, values = [], []
+            for row in range(wksheet.nrows):
+                types = wksheet.row_types(row)
+                if xlrd.XL_CELL_DATE not in types:
+                    continue
+                row_values = wksheet.row_values(row)
+                for col, ctype in enumerate(types):
+                    if ctype == xlrd.XL_CELL_DATE:
+                        coordinates.append((row, col))
+                        values.append(row_values[col])
+            self._dates = dict(zip(coordinates,
+                                   xldate_values(values, self.book.datemode)))
+        return self._dates
+
+    def _cell(self, cell, row, col, is_merged):
+        date = None
+        if cell.ctype == xlrd.XL_CELL_DATE:
+            date = self.dates.get((row, col))
+        return xlrdCell(cell, self.wksheet, is_merged, self.xf_table, date)
 
+    @property
+    def bottom(self):
+        return self.wksheet.nrows
 
-class xlrdExcelSheet(SheetDocument, CellRange):
-    def __init__(self, wksheet):
-        self.name = wksheet.name
-        self.wksheet = wksheet
-        self.merged = {}
-        for crange in wksheet.merged_cells:
-            rlo, rhi, clo, chi = crange
-            for rowx in range(rlo, rhi):
-                for colx in range(clo, chi):
-                    if (rlo, clo) != (rowx, colx):
-                        self.merged[rowx, colx] = (rlo, clo)
-        self.top, self.left = 0, 0
-        self.bottom = wksheet.nrows
-        self.right = wksheet.ncols
+    @property
+    def right(self):
+        return self.wksheet.ncols
 
     def is_hidden(self):
-        return self.wksheet.visibility != 0
+        return self.book._sheet_visibility[self.index] != 0
 
     def is_hidden_row(self, rowidx):
         row_info = self.wksheet.rowinfo_map.get(rowidx)
@@ -133,32 +244,117 @@ class xlrdExcelSheet(SheetDocument, CellRange):
         return row_info.hidden
 
     def cell(self, row, col, ignore_merged=False):
-        is_merged = False
-        if (row, col) in self.merged:
-            is_merged = True
-            row, col = self.merged[row, col]
-        return xlrdCell(self.wksheet.cell(row, col), self.wksheet, is_merged)
+        wksheet = self.wksheet
+        anchor = self._merged.get((row, col))
+        is_merged = anchor is not None
+        if is_merged:
+            row, col = anchor
+        return self._cell(wksheet.cell(row, col), row, col, is_merged)
+
+    def _in_sheet(self, bottom, right):
+        return bottom <= self.wksheet.nrows and right <= self.wksheet.ncols
+
+    def _line_data(self, coordinates, values, types):
+        wksheet = self.wksheet
+        types = list(types)
+        merged = [False] * len(values)
+        if self._merged:
+            coordinates = list(coordinates)
+            for i, key in enumerate(coordinates):
+                anchor = self._merged.get(key)
+                if anchor is not None:
+                    merged[i] = True
+                    coordinates[i] = anchor
+                    values[i] = wksheet.cell_value(*anchor)
+                    types[i] = wksheet.cell_type(*anchor)
+        empty = []
+        for i, ctype in enumerate(types):
+            if ctype == xlrd.XL_CELL_DATE:
+                date = self.dates.get(coordinates[i])
+                if date is None:
+                    date = xldate_value(values[i], self.book.datemode)
+                values[i] = date
+            empty.append(ctype in EMPTY_TYPES or
+                         (ctype == xlrd.XL_CELL_TEXT and values[i].strip() == ''))
+        return LineData(values, merged, empty, types)
+
+    def row_data(self, row, left, right):
+        """the values, types, empty and merged flags of a row in one
+        call, from the lists kept by xlrd"""
+        if not self._in_sheet(row + 1, right):
+            return super(xlrdExcelSheet, self).row_data(row, left, right)
+        wksheet = self.wksheet
+        return self._line_data([(row, col) for col in range(left, right)],
+                               wksheet.row_values(row, left, right),
+                               wksheet.row_types(row, left, right))
+
+    def col_data(self, col, top, bottom):
+        """the values, types, empty and merged flags of a column in
+        one call"""
+        if not self._in_sheet(bottom, col + 1):
+            return super(xlrdExcelSheet, self).col_data(col, top, bottom)
+        wksheet = self.wksheet
+        return self._line_data([(row, col) for row in range(top, bottom)],
+                               wksheet.col_values(col, top, bottom),
+                               wksheet.col_types(col, top, bottom))
+
+    def row_cells(self, row, left, right):
+        if not self._in_sheet(row + 1, right) or self._merged:
+            return super(xlrdExcelSheet, self).row_cells(row, left, right)
+        return [self._cell(cell, row, col, False)
+                for col, cell in enumerate(self.wksheet.row_slice(row, left, right),
+                                           left)]
+
+    def col_cells(self, col, top, bottom):
+        if not self._in_sheet(bottom, col + 1) or self._merged:
+            return super(xlrdExcelSheet, self).col_cells(col, top, bottom)
+        return [self._cell(cell, row, col, False)
+                for row, cell in enumerate(self.wksheet.col_slice(col, top, bottom),
+                                           top)]
 
     def __repr__(self):
         return "<xlrdExcelSheet %s>" % self.name
 
 
 class xlrdExcelWorkbook(WorkbookDocument):
-    def __init__(self, filename, with_formatting=True):
-        '''with formatting is required for merged cells and border detection'''
-        self.wbk = xlrd.open_workbook(filename=filename,
-                                      formatting_info=with_formatting)
+    """Opens the workbook `on_demand` by default: a sheet is only read
+    when its cells are used, and it is unloaded when the iteration
+    moves to the next sheet. Sheets obtained by name or index are
+    kept until they are released."""
+
+    def __init__(self, filename, with_formatting=True, on_demand=True):
+        '''with formatting is required for merged cells and border
+        detection. `filename` can also be a binary file'''
+        if isinstance(filename, (str, os.PathLike)):
+            options = {'filename': filename}
+        else:
+            contents = file_contents(filename)
+            data = getattr(getattr(filename, 'raw', None), 'data', None)
+            if isinstance(contents, mmap.mmap) and (
+                    contents is data or contents is getattr(data, 'obj', None)):
+                contents = BorrowedBuffer(contents)
+            options = {'file_contents': contents}
+        self.wbk = xlrd.open_workbook(formatting_info=with_formatting,
+                                      on_demand=on_demand, **options)
+        self.xf_table = XfTable(self.wbk) if with_formatting else None
 
     def __iter__(self):
         for w in range(self.wbk.nsheets):
-            yield xlrdExcelSheet(self.wbk.sheet_by_index(w))
-            self.wbk.release_resources()
+            sheet = xlrdExcelSheet(self.wbk, w, self.xf_table)
+            yield sheet
+            sheet.release()
 
     def __getitem__(self, name_or_id):
         if isinstance(name_or_id, str):
-            return xlrdExcelSheet(self.wbk.sheet_by_name(name_or_id))
-        else:
-            return xlrdExcelSheet(self.wbk.sheet_by_index(name_or_id))
+            try:
+                name_or_id = self.wbk.sheet_names().index(name_or_id)
+            except ValueError:
+                raise xlrd.XLRDError('No sheet named <%r>' % name_or_id)
+        return xlrdExcelSheet(self.wbk, name_or_id, self.xf_table)
+
+    def close(self):
+        """Releases the file kept open by an on-demand workbook"""
+        self.wbk.release_resources()
 
 
 load_workbook = xlrdExcelWorkbook
@@ -0,0 +1,237 @@
+"""Reads binary Excel workbooks (.xlsb) with the BIFF12 record reader
+of pyxlsb. The records of a sheet are streamed from the zip file row by
+row and only a window of rows is kept in memory. Date cells are
+recognised from the number format of their style; borders, fills and
+merged cells are not read."""
+
+import collections
+import posixpath
+import struct
+import zipfile
+from xml.etree.ElementTree import parse
+
+from pyxlsb import biff12
+from pyxlsb.reader import BIFF12Reader, RecordReader
+from pyxlsb.stringtable import StringTable
+
+from ..documents import CellRange, SheetDocument, WorkbookDocument
+from ..utils import ConfigurationError
+from ._array import rawCell
+from ._xlsx import DATE_FORMAT_IDS, is_date_format, xldate_value
+
+ROW_WINDOW = 1000
+# records of styles.bin not handled by pyxlsb
+FMT, XF = 44, 47
+CELLXFS, CELLXFS_END = biff12.CELLXFS, biff12.CELLXFS_END
+STYLE_MASK = 0xFFFFFF  # the style index, without the flags of the cell
+HIDDEN_SHEET_MASK = 0x3  # hsState of BrtBundleSh: 0 is visible
+HIDDEN_ROW_FLAG = 0x10  # fDyZero of BrtRowHdr, in its 12th byte
+INLINE_STRING = 6  # BrtCellSt, not handled by pyxlsb
+WORKBOOK_PROPERTIES = 153  # BrtWbProp
+DATE1904_FLAG = 0x1  # f1904 of BrtWbProp
+
+
+def _raw_records(fp):
+    """the (id, data) of the records of a part"""
+    reader = BIFF12Reader(fp=fp)
+    while True:
+        recid = reader.read_id()
+        reclen = reader.read_len()
+        if recid is None or reclen is None:
+            return
+        yield recid, fp.read(reclen)
+
+
+def read_date_styles(fp):
+    """the indices of the cell styles that display a date"""
+    formats = {}
+    date_styles = set()
+    style_id = None
+    for recid, data in _raw_records(fp):
+        if recid == FMT:
+            with RecordReader(data) as reader:
+                numfmt = reader.read_short()
+                formats[numfmt] = reader.read_string()
+        elif recid == CELLXFS:
+            style_id = 0
+        elif recid == CELLXFS_END:
+            break
+        elif recid == XF and style_id is not None:
+            with RecordReader(data) as reader:
+                reader.skip(2)
+                numfmt = reader.read_short()
+            code = formats.get(numfmt)
+            if numfmt in DATE_FORMAT_IDS if code is None else is_date_format(code):
+                date_styles.add(style_id)
+            style_id += 1
+    return date_styles
+
+
+class xlsbSheet(SheetDocument, CellRange):
+    """A sheet read in sequence: the rows before the window are read
+    again from the start of the sheet data."""
+
+    def __init__(self, workbook, name, path, hidden=False):
+        self.workbook = workbook
+        self.name = name
+        self.path = path
+        self.hidden = hidden
+        self.window = workbook.window
+        self.top, self.left = 0, 0
+        self.bottom = self.right = 0
+        self._rows = collections.OrderedDict()
+        # all the rows from _first_row to _last_row are known
+        self._first_row, self._last_row = 0, -1
+        # the hidden rows read so far
+        self._hidden_rows = set()
+        self._row_iter = None
+        self._fp = None
+        with workbook.zfile.open(path) as fp:
+            for recid, item in BIFF12Reader(fp=fp):
+                if recid == biff12.DIMENSION:
+                    self.bottom = item.r + item.h
+                    self.right = item.c + item.w
+                elif recid == biff12.SHEETDATA:
+                    break
+
+    def is_hidden(self):
+        return self.hidden
+
+    def is_hidden_row(self, rowidx):
+        self._row(self.top + rowidx)
+        return self.top + rowidx in self._hidden_rows
+
+    def _iter_rows(self):
+        """yields the rows as (row, {col: (value, style)}, hidden),
+        skipping the empty rows that are not hidden. The records are
+        read raw, as pyxlsb doesn't keep the flags of the rows."""
+        self.close()
+        self._fp = fp = self.workbook.zfile.open(self.path)
+        records = _raw_records(fp)
+        for recid, data in records:
+            if recid == biff12.SHEETDATA:
+                break
+        row, cells, hidden = None, {}, False
+        string_table = self.workbook.string_table
+        handlers = BIFF12Reader.handlers
+        for recid, data in records:
+            if recid == biff12.ROW:
+                if cells or hidden:
+                    yield row, cells, hidden
+                row, cells = struct.unpack_from('<I', data)[0], {}
+                hidden = len(data) > 11 and bool(data[11] & HIDDEN_ROW_FLAG)
+            elif recid == INLINE_STRING:
+                with RecordReader(data) as reader:
+                    col, style = reader.read_int(), reader.read_int()
+                    cells[col] = (reader.read_string(), style & STYLE_MASK)
+            elif biff12.BLANK < recid <= biff12.FORMULA_BOOLERR:
+                handler = handlers.get(recid)
+                if handler is None:
+                    continue
+                with RecordReader(data) as reader:
+                    item = handler.read(reader, recid, len(data))
+                value = item.v
+                if recid == biff12.STRING:
+                    value = string_table[value]
+                cells[item.c] = (value, item.style & STYLE_MASK)
+            elif recid == biff12.SHEETDATA_END:
+                break
+        if cells or hidden:
+            yield row, cells, hidden
+        self.close()
+
+    def close(self):
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+    def _row(self, row):
+        if self._row_iter is None or row < self._first_row:
+            self._row_iter = self._iter_rows()
+            self._rows.clear()
+            self._first_row, self._last_row = 0, -1
+        while self._last_row < row:
+            row_cells = next(self._row_iter, None)
+            if row_cells is None:
+                self._last_row = self.bottom
+                break
+            self._last_row = row_cells[0]
+            self._rows[row_cells[0]] = row_cells[1]
+            if row_cells[2]:
+                self._hidden_rows.add(row_cells[0])
+            if len(self._rows) > self.window:
+                self._first_row = self._rows.popitem(last=False)[0] + 1
+        return self._rows.get(row, {})
+
+    def cell(self, row, col):
+        value, style = self._row(self.top + row).get(self.left + col, (None, 0))
+        if style in self.workbook.date_styles and isinstance(value, float):
+            value = xldate_value(value, self.workbook.date1904)
+        return rawCell(row, col, value)
+
+    def __repr__(self):
+        return "<xlsbSheet %s>" % self.name
+
+
+class xlsbWorkbook(WorkbookDocument):
+    """Reads the list of sheets, the shared strings and the date styles
+    when opened; the sheets are read when used."""
+
+    def __init__(self, filename, with_formatting=False, window=ROW_WINDOW):
+        if with_formatting:
+            raise ConfigurationError("The xlsb backend doesn't read formatting")
+        self.zfile = zipfile.ZipFile(filename)
+        self.window = window
+        self.sheets, self.date1904 = self._read_workbook()
+        self.string_table = None
+        if 'xl/sharedStrings.bin' in self.zfile.namelist():
+            with self.zfile.open('xl/sharedStrings.bin') as fp:
+                self.string_table = StringTable(fp)
+        self.date_styles = set()
+        if 'xl/styles.bin' in self.zfile.namelist():
+            with self.zfile.open('xl/styles.bin') as fp:
+                self.date_styles = read_date_styles(fp)
+
+    def _read_workbook(self):
+        """the names, the paths and the hidden state of the sheets, and
+        whether the dates count from 1904"""
+        with self.zfile.open('xl/_rels/workbook.bin.rels') as fp:
+            targets = {rel.get('Id'): rel.get('Target') for rel in parse(fp).getroot()}
+        sheets = []
+        date1904 = False
+        handler = BIFF12Reader.handlers[biff12.SHEET]
+        with self.zfile.open('xl/workbook.bin') as fp:
+            for recid, data in _raw_records(fp):
+                if recid == WORKBOOK_PROPERTIES:
+                    date1904 = bool(struct.unpack_from('<I', data)[0] & DATE1904_FLAG)
+                elif recid == biff12.SHEET:
+                    with RecordReader(data) as reader:
+                        item = handler.read(reader, recid, len(data))
+                    target = targets[item.rId]
+                    path = (target[1:] if target.startswith('/')
+                            else posixpath.normpath(posixpath.join('xl', target)))
+                    hidden = bool(struct.unpack_from('<I', data)[0] & HIDDEN_SHEET_MASK)
+                    sheets.append((item.name, path, hidden))
+                elif recid == biff12.SHEETS_END:
+                    break
+        return sheets, date1904
+
+    def __iter__(self):
+        for name, path, hidden in self.sheets:
+            sheet = xlsbSheet(self, name, path, hidden)
+            yield sheet
+            sheet.close()
+
+    def __getitem__(self, name_or_id):
+        if isinstance(name_or_id, str):
+            for name, path, hidden in self.sheets:
+                if name == name_or_id:
+                    return xlsbSheet(self, name, path, hidden)
+            raise KeyError(name_or_id)
+        return xlsbSheet(self, *self.sheets[name_or_id])
+
+    def close(self):
+        self.zfile.close()
+
+
+load_workbook = xlsbWorkbook
@@ -0,0 +1,543 @@
+"""Reads xlsx workbooks without an Excel library: the xml of each sheet
+is streamed from the zip file with expat handlers (the shared strings
+with iterparse) and the cells are kept in compact arrays. Strings are
+kept as indices into the shared strings table and cells keep their
+style id (the index in cellXfs): borders and fills are only resolved
+when they are asked for."""
+
+import array
+import datetime
+import posixpath
+import re
+import zipfile
+from bisect import bisect_left
+from xml.etree.ElementTree import Element, iterparse, parse
+from xml.parsers import expat
+
+from ..documents import (BORDER_TOP, BORDER_LEFT,
+                         BORDER_BOTTOM, BORDER_RIGHT,
+                         CellRange, LineData, MergedCells, SheetDocument,
+                         WorkbookDocument)
+from ..utils import EMPTY_CELL
+
+MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PACKAGE_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+# the kinds of cells
+EMPTY, NUMBER, INTEGER, SHARED_STRING, STRING, BOOLEAN = range(6)
+
+DATE_FORMAT_IDS = frozenset(list(range(14, 23)) + [45, 46, 47])
+DATE_FORMAT_STRIP = re.compile(r'"[^"]*"|\\.|\[(?!h+\]|m+\]|s+\])[^\]]*\]')
+DATE_FORMAT_CHARS = re.compile(r'[dmyhs]', re.IGNORECASE)
+EPOCHS = (datetime.datetime(1899, 12, 30), datetime.datetime(1904, 1, 1))
+# the first serials that are too large to be dates, as in xlrd
+XLDAYS_TOO_LARGE = (2958466, 2958466 - 1462)
+# a number written with a decimal point or an exponent is a float
+INTEGER_MARKS = re.compile('[.eE]')
+
+
+def is_date_format(code):
+    """a number format displays a date if its first section uses
+    date or time fields outside of quotes and brackets"""
+    code = DATE_FORMAT_STRIP.sub('', code.split(';')[0])
+    return DATE_FORMAT_CHARS.search(code) is not None
+
+
+def xldate_value(value, date1904=False):
+    """converts a serial date to a datetime, or a time if there is no
+    date part. Negative serials, the 1900-02-29 that Excel counts (60)
+    and the serials after 9999 are not dates: the number is returned,
+    as xlrd does"""
+    if (value < 0 or value >= XLDAYS_TOO_LARGE[date1904] or
+            (not date1904 and 60 <= value < 61)):
+        return value
+    seconds = int(round(value * 86400))
+    if 0 <= seconds < 86400:
+        return datetime.time(seconds // 3600, seconds // 60 % 60, seconds % 60)
+    epoch = EPOCHS[date1904]
+    if not date1904 and value < 60:
+        # before the 1900-02-29
+        epoch += datetime.timedelta(days=1)
+    return epoch + datetime.timedelta(seconds=seconds)
+
+
+def _iso_date(value):
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return value
+
+
+_COLUMNS = {}
+
+
+def column_index(ref):
+    """the 0-based column of a cell reference such as 'AB12'"""
+    letters = ref.rstrip('0123456789')
+    col = _COLUMNS.get(letters)
+    if col is None:
+        col = 0
+        for letter in letters:
+            col = col * 26 + ord(letter) - 64
+        col = _COLUMNS[letters] = col - 1
+    return col
+
+
+def _range_bounds(ref):
+    """converts 'A1:B2' to (top, bottom, left, right), 0-based, the
+    end excluded"""
+    first, __, last = ref.partition(':')
+    last = last or first
+    return (int(first.lstrip('ABCDEFGHIJKLMNOPQRSTUVWXYZ')) - 1,
+            int(last.lstrip('ABCDEFGHIJKLMNOPQRSTUVWXYZ')),
+            column_index(first), column_index(last) + 1)
+
+
+def _text(elem):
+    """the text of a shared string or inline string, without the
+    phonetic runs"""
+    parts = []
+    for child in elem:
+        if child.tag == MAIN_NS + 't':
+            parts.append(child.text or '')
+        elif child.tag == MAIN_NS + 'r':
+            parts.extend(t.text or '' for t in child.iter(MAIN_NS + 't'))
+    return ''.join(parts)
+
+
+def color_value(elem, indexed_colors):
+    if elem is None:
+        return None
+    if elem.get('theme') is not None:
+        return {'theme': int(elem.get('theme'))}
+    if elem.get('rgb') is not None:
+        rgb = elem.get('rgb')
+        return tuple(int(rgb[i:i + 2], 16) for i in range(len(rgb) - 6, len(rgb), 2))
+    if elem.get('indexed') is not None:
+        index = int(elem.get('indexed'))
+        if index < len(indexed_colors):
+            return color_value(indexed_colors[index], ())
+        return {'indexed': index}
+    return None
+
+
+class Fill(object):
+    """The fill of a style. Indexed colours are only converted when
+    the workbook defines its palette"""
+
+    def __init__(self, elem, indexed_colors):
+        pattern = elem.find(MAIN_NS + 'patternFill')
+        self.color1 = None
+        self.color2 = None
+        self.pattern = None
+        if elem.find(MAIN_NS + 'gradientFill') is not None:
+            self.type = 'gradientFill'
+            return
+        self.type = 'patternFill'
+        if pattern is not None and pattern.get('patternType', 'none') != 'none':
+            self.pattern = pattern.get('patternType')
+            self.color1 = color_value(pattern.find(MAIN_NS + 'fgColor'), indexed_colors)
+            self.color2 = color_value(pattern.find(MAIN_NS + 'bgColor'), indexed_colors)
+
+    def __repr__(self):
+        return "<Fill %s %s %s %s>" % (self.type, self.pattern,
+                                       self.color1, self.color2)
+
+
+class Styles(object):
+    """The cellXfs of the workbook with the borders and fills they
+    refer to, kept as xml elements until a Formatting is needed"""
+
+    def __init__(self, zfile):
+        self.xfs = []
+        self.borders = []
+        self.fills = []
+        self.indexed_colors = ()
+        self.number_formats = {}
+        if 'xl/styles.xml' not in zfile.namelist():
+            return
+        with zfile.open('xl/styles.xml') as f:
+            root = parse(f).getroot()
+        for numfmt in root.iterfind('%snumFmts/%snumFmt' % (MAIN_NS, MAIN_NS)):
+            self.number_formats[int(numfmt.get('numFmtId'))] = numfmt.get('formatCode', '')
+        self.borders = root.findall('%sborders/%sborder' % (MAIN_NS, MAIN_NS))
+        self.fills = root.findall('%sfills/%sfill' % (MAIN_NS, MAIN_NS))
+        self.indexed_colors = root.findall('%scolors/%sindexedColors/%srgbColor'
+                                           % (MAIN_NS, MAIN_NS, MAIN_NS))
+        self.xfs = [(int(xf.get('numFmtId', 0)), int(xf.get('borderId', 0)),
+                     int(xf.get('fillId', 0)))
+                    for xf in root.iterfind('%scellXfs/%sxf' % (MAIN_NS, MAIN_NS))]
+
+    def date_styles(self):
+        """the style ids whose number format is a date"""
+        result = set()
+        for style_id, (numfmt, __, __) in enumerate(self.xfs):
+            code = self.number_formats.get(numfmt)
+            if (numfmt in DATE_FORMAT_IDS if code is None else is_date_format(code)):
+                result.add(style_id)
+        return result
+
+
+class Formatting(object):
+    """The formatting of a style id, computed once per workbook and
+    shared by all the cells with that style"""
+
+    def __init__(self, styles, style_id):
+        self._styles = styles
+        __, border_id, self._fill_id = (styles.xfs[style_id]
+                                        if style_id < len(styles.xfs) else (0, 0, 0))
+        self.border_mask = 0
+        if border_id < len(styles.borders):
+            border = styles.borders[border_id]
+            for side, mask in (('top', BORDER_TOP), ('left', BORDER_LEFT),
+                               ('bottom', BORDER_BOTTOM), ('right', BORDER_RIGHT)):
+                elem = border.find(MAIN_NS + side)
+                if elem is not None and elem.get('style', 'none') != 'none':
+                    self.border_mask |= mask
+        self._fill = None
+
+    @property
+    def fill(self):
+        if self._fill is None:
+            fills = self._styles.fills
+            elem = (fills[self._fill_id] if self._fill_id < len(fills)
+                    else Element(MAIN_NS + 'fill'))
+            self._fill = Fill(elem, self._styles.indexed_colors)
+        return self._fill
+
+    @property
+    def is_filled(self):
+        return self.fill.type != 'patternFill' or self.fill.pattern is not None
+
+
+class xlsxCell(object):
+    def __init__(self, value, formatting, is_merged):
+        self.value = value
+        self.formatting = formatting
+        self.is_merged = is_merged
+
+    @property
+    def is_empty(self):
+        return self.value == EMPTY_CELL
+
+    @property
+    def border_mask(self):
+        return self.formatting.border_mask
+
+    def has_borders(self, mask):
+        return bool(self.formatting.border_mask & mask)
+
+    @property
+    def fill(self):
+        return self.formatting.fill
+
+    @property
+    def is_filled(self):
+        return self.formatting.is_filled
+
+    def __repr__(self):
+        return "<xlsxCell %r>" % (self.value,)
+
+
+class SheetData(object):
+    """The cells of a sheet in arrays: `cols`, `kinds`, `numbers`
+    (values, or indices into the shared strings or into `strings`,
+    which keeps the other values) and `styles`, ordered by row and
+    column. The cells of row r are
+    between `row_starts[r]` and `row_starts[r + 1]`."""
+
+    def __init__(self):
+        self.row_starts = array.array('l', [0])
+        self.cols = array.array('l')
+        self.kinds = array.array('b')
+        self.numbers = array.array('d')
+        self.styles = array.array('l')
+        self.strings = []
+        self.merged_ranges = []
+        self.hidden_rows = set()
+        self.width = 0
+
+    @property
+    def height(self):
+        return len(self.row_starts) - 1
+
+    def find(self, row, col):
+        """the position of a cell in the arrays, or None"""
+        if row >= len(self.row_starts) - 1:
+            return None
+        lo, hi = self.row_starts[row], self.row_starts[row + 1]
+        index = bisect_left(self.cols, col, lo, hi)
+        if index < hi and self.cols[index] == col:
+            return index
+        return None
+
+
+def _cell_kind(value, cell_type, strings):
+    """the kind and the number stored for the value of a cell"""
+    if value is None or (value == '' and cell_type in ('n', 's', 'b')):
+        return EMPTY, 0
+    if cell_type == 'n':
+        number = float(value)
+        if number.is_integer() and not INTEGER_MARKS.search(value):
+            return INTEGER, number
+        return NUMBER, number
+    if cell_type == 's':
+        return SHARED_STRING, int(value)
+    if cell_type == 'b':
+        return BOOLEAN, value == '1'
+    # str, inlineStr, e, d
+    strings.append(_iso_date(value) if cell_type == 'd' else value)
+    return STRING, len(strings) - 1
+
+
+def read_sheet(source):
+    """Streams a worksheet xml into a SheetData. The cells are stored
+    by the expat handlers as they are read: no tree of the xml is
+    built and the memory used by the parser stays flat."""
+    data = SheetData()
+    row_starts, cols, kinds = data.row_starts, data.cols, data.kinds
+    numbers, styles, strings = data.numbers, data.styles, data.strings
+    # the tags are compared with their prefix, set from the root
+    # element, rather than with namespace processing
+    tag_row = tag_c = tag_v = tag_t = tag_rph = tag_merge = None
+    columns = _COLUMNS
+    # the state of the current cell
+    col = -1
+    cell_type = style = value = None
+    in_text = in_phonetic = False
+
+    def start(tag, attrs):
+        nonlocal col, cell_type, style, value, in_text, in_phonetic
+        nonlocal tag_row, tag_c, tag_v, tag_t, tag_rph, tag_merge
+        if tag_c is None:
+            prefix = tag[:-len('worksheet')]
+            tag_row, tag_c, tag_v, tag_t = (prefix + 'row', prefix + 'c',
+                                            prefix + 'v', prefix + 't')
+            tag_rph, tag_merge = prefix + 'rPh', prefix + 'mergeCell'
+        elif tag == tag_c:
+            ref = attrs.get('r')
+            if ref is None:
+                col += 1
+            else:
+                col = columns.get(ref.rstrip('0123456789'))
+                if col is None:
+                    col = column_index(ref)
+            cell_type = attrs.get('t', 'n')
+            style = attrs.get('s')
+            value = None
+        elif tag == tag_v:
+            in_text = True
+            value = ''
+        elif tag == tag_t:
+            if not in_phonetic:
+                in_text = True
+                value = value or ''
+        elif tag == tag_row:
+            ref = attrs.get('r')
+            row = int(ref) - 1 if ref is not None else len(row_starts) - 1
+            while len(row_starts) <= row:
+                row_starts.append(len(cols))
+            if attrs.get('hidden') in ('1', 'true'):
+                data.hidden_rows.add(row)
+            col = -1
+        elif tag == tag_rph:
+            in_phonetic = True
+        elif tag == tag_merge:
+            data.merged_ranges.append(_range_bounds(attrs['ref']))
+
+    def characters(text):
+        nonlocal value
+        if in_text:
+            value += text
+
+    def end(tag):
+        nonlocal in_text, in_phonetic
+        in_text = False
+        if tag == tag_c:
+            kind, number = _cell_kind(value, cell_type, strings)
+            cols.append(col)
+            kinds.append(kind)
+            numbers.append(number)
+            styles.append(int(style) if style is not None else 0)
+            if col >= data.width:
+                data.width = col + 1
+        elif tag == tag_row:
+            row_starts.append(len(cols))
+        elif tag == tag_rph:
+            in_phonetic = False
+
+    parser = expat.ParserCreate()
+    parser.buffer_text = True
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = characters
+    parser.ParseFile(source)
+    return data
+
+
+class xlsxSheet(SheetDocument, CellRange):
+    """A sheet of the workbook, read when its cells are first needed.
+    `release` drops the cells; they are read again if the sheet is
+    used after that."""
+
+    def __init__(self, workbook, name, path, state):
+        self.workbook = workbook
+        self.name = name
+        self.path = path
+        self.state = state
+        self.top, self.left = 0, 0
+        self._data = None
+        self.merged = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            with self.workbook.zfile.open(self.path) as source:
+                self._data = read_sheet(source)
+            self.merged = MergedCells(self._data.merged_ranges)
+        return self._data
+
+    def release(self):
+        self._data = None
+        self.merged = None
+
+    @property
+    def bottom(self):
+        return self.data.height
+
+    @property
+    def right(self):
+        return self.data.width
+
+    def is_hidden(self):
+        return self.state != 'visible'
+
+    def is_hidden_row(self, rowidx):
+        return rowidx in self.data.hidden_rows
+
+    def _value(self, index):
+        data = self.data
+        if index is None:
+            return EMPTY_CELL, 0
+        kind, style = data.kinds[index], data.styles[index]
+        if kind == NUMBER or kind == INTEGER:
+            value = data.numbers[index]
+            if style in self.workbook.date_styles:
+                value = xldate_value(value, self.workbook.date1904)
+            elif kind == INTEGER:
+                value = int(value)
+        elif kind == SHARED_STRING:
+            value = self.workbook.shared_strings[int(data.numbers[index])]
+        elif kind == STRING:
+            value = data.strings[int(data.numbers[index])]
+        elif kind == BOOLEAN:
+            value = bool(data.numbers[index])
+        else:
+            value = EMPTY_CELL
+        return value, style
+
+    def cell(self, row, col):
+        data = self.data
+        anchor = self.merged.get((row, col))
+        is_merged = anchor is not None
+        if is_merged:
+            row, col = anchor
+        value, style = self._value(data.find(row, col))
+        return xlsxCell(value, self.workbook.get_formatting(style), is_merged)
+
+    def row_data(self, row, left, right):
+        """the values of a row, read from the arrays without creating
+        the cells"""
+        data = self.data
+        if self.merged or row >= data.height:
+            return super(xlsxSheet, self).row_data(row, left, right)
+        values = [EMPTY_CELL] * (right - left)
+        lo, hi = data.row_starts[row], data.row_starts[row + 1]
+        index = bisect_left(data.cols, left, lo, hi)
+        cols = data.cols
+        while index < hi and cols[index] < right:
+            values[cols[index] - left] = self._value(index)[0]
+            index += 1
+        return LineData(values, [False] * len(values),
+                        [value == EMPTY_CELL for value in values])
+
+    def __repr__(self):
+        return "<xlsxSheet %s>" % self.name
+
+
+class xlsxWorkbook(WorkbookDocument):
+    """Reads the shared strings, the styles and the list of sheets
+    when opened; the sheets are read when used. Iterating releases
+    each sheet when moving to the next one."""
+
+    def __init__(self, filename, with_formatting=True):
+        self.zfile = zipfile.ZipFile(filename)
+        self.with_formatting = with_formatting
+        with self.zfile.open('xl/workbook.xml') as f:
+            root = parse(f).getroot()
+        workbook_pr = root.find(MAIN_NS + 'workbookPr')
+        self.date1904 = (workbook_pr is not None and
+                         workbook_pr.get('date1904') in ('1', 'true'))
+        targets = self._relationships('xl/_rels/workbook.xml.rels')
+        self.sheets = [(sheet.get('name'),
+                        targets[sheet.get(REL_NS + 'id')],
+                        sheet.get('state', 'visible'))
+                       for sheet in root.iterfind('%ssheets/%ssheet' % (MAIN_NS, MAIN_NS))]
+        self.shared_strings = self._shared_strings()
+        self.styles = Styles(self.zfile)
+        self.date_styles = self.styles.date_styles()
+        self._formatting = {}
+
+    def _relationships(self, path):
+        with self.zfile.open(path) as f:
+            root = parse(f).getroot()
+        result = {}
+        for rel in root.iter(PACKAGE_REL_NS + 'Relationship'):
+            target = rel.get('Target')
+            if target.startswith('/'):
+                target = target[1:]
+            else:
+                target = posixpath.normpath(posixpath.join('xl', target))
+            result[rel.get('Id')] = target
+        return result
+
+    def _shared_strings(self):
+        if 'xl/sharedStrings.xml' not in self.zfile.namelist():
+            return []
+        result = []
+        tag_si = MAIN_NS + 'si'
+        with self.zfile.open('xl/sharedStrings.xml') as f:
+            for event, elem in iterparse(f):
+                if elem.tag == tag_si:
+                    result.append(_text(elem))
+                    elem.clear()
+        return result
+
+    def get_formatting(self, style_id):
+        if not self.with_formatting:
+            return None
+        formatting = self._formatting.get(style_id)
+        if formatting is None:
+            formatting = self._formatting[style_id] = Formatting(self.styles, style_id)
+        return formatting
+
+    def __iter__(self):
+        for name, path, state in self.sheets:
+            sheet = xlsxSheet(self, name, path, state)
+            yield sheet
+            sheet.release()
+
+    def __getitem__(self, name_or_id):
+        if isinstance(name_or_id, str):
+            for name, path, state in self.sheets:
+                if name == name_or_id:
+                    return xlsxSheet(self, name, path, state)
+            raise KeyError(name_or_id)
+        return xlsxSheet(self, *self.sheets[name_or_id])
+
+    def close(self):
+        self.zfile.close()
+
+
+load_workbook = xlsxWorkbook
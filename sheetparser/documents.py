@@ -6,14 +6,18 @@ supplied by backends.
 """
 
 import abc
+import bisect
+import collections
+import collections.abc
 import importlib
 import os
 import sys
+import zipfile
 from abc import abstractmethod
 
 import six
 
-from .utils import ConfigurationError, deprecated
+from .utils import ConfigurationError, deprecated, open_source
 
 
 # Documents
@@ -103,6 +107,31 @@ class RbColIterator(RollbackIterator):
         return CellColumn(self.rge, self.idx)
 
 
+class LineData(object):
+    """The values of a line of cells, with their merged flags, obtained
+    in one call. The empty flags are computed from the cells unless the
+    backend provides them; `types` is only known by some backends."""
+    __slots__ = ('values', 'merged', 'types', '_empty', '_cells')
+
+    def __init__(self, values, merged, empty=None, types=None, cells=None):
+        self.values = values
+        self.merged = merged
+        self.types = types
+        self._empty = empty
+        self._cells = cells
+
+    @classmethod
+    def from_cells(cls, cells):
+        return cls([cell.value for cell in cells],
+                   [cell.is_merged for cell in cells], cells=cells)
+
+    @property
+    def empty(self):
+        if self._empty is None:
+            self._empty = [cell.is_empty for cell in self._cells]
+        return self._empty
+
+
 class CellRange(Document):
     """A range (a 2D area) of cells, relative to a parent range"""
 
@@ -127,6 +156,37 @@ class CellRange(Document):
     def cell(self, row, col):
         return self.rge.cell(self.top + row, self.left + col)
 
+    # the line methods are sent to the sheet, that may implement them
+    # more efficiently than cell by cell
+
+    def row_cells(self, row, left, right):
+        """iterates on the cells of a row, from left to right (excluded)"""
+        if isinstance(self, SheetDocument):
+            return _iter_cells(self, ((row, col) for col in range(left, right)))
+        return self.rge.row_cells(self.top + row, self.left + left,
+                                  self.left + right)
+
+    def col_cells(self, col, top, bottom):
+        """iterates on the cells of a column, from top to bottom (excluded)"""
+        if isinstance(self, SheetDocument):
+            return _iter_cells(self, ((row, col) for row in range(top, bottom)))
+        return self.rge.col_cells(self.left + col, self.top + top,
+                                  self.top + bottom)
+
+    def row_data(self, row, left, right):
+        """returns the LineData of a row, from left to right (excluded)"""
+        if isinstance(self, SheetDocument):
+            return LineData.from_cells(list(self.row_cells(row, left, right)))
+        return self.rge.row_data(self.top + row, self.left + left,
+                                 self.left + right)
+
+    def col_data(self, col, top, bottom):
+        """returns the LineData of a column, from top to bottom (excluded)"""
+        if isinstance(self, SheetDocument):
+            return LineData.from_cells(list(self.col_cells(col, top, bottom)))
+        return self.rge.col_data(self.left + col, self.top + top,
+                                 self.top + bottom)
+
     def __repr__(self):
         return "<CellRange %s %s>" % (
             self.rge, (self.top, self.left, self.bottom, self.right))
@@ -146,6 +206,16 @@ class CellRange(Document):
         return 'CellRange:<%s>' % (str(list(str(row) for row in self.rows())))
 
 
+def _iter_cells(sheet, coordinates):
+    """yields the cells of the sheet, stopping at the first cell
+    that doesn't exist"""
+    try:
+        for row, col in coordinates:
+            yield sheet.cell(row, col)
+    except IndexError:
+        return
+
+
 def _abs_index(rge, i):
     if i < 0:
         i = len(rge) + i
@@ -179,6 +249,12 @@ class CellColumn(CellRange):
         return self.rge.cell(self.top +
                              _abs_index(self, i), self.col)
 
+    def __iter__(self):
+        return iter(self.rge.col_cells(self.col, self.top, self.bottom))
+
+    def line_data(self):
+        return self.rge.col_data(self.col, self.top, self.bottom)
+
     def __len__(self):
         return self.bottom - self.top
 
@@ -213,6 +289,12 @@ class CellRow(CellRange):
         return self.rge.cell(self._row,
                              self.left + _abs_index(self, i))
 
+    def __iter__(self):
+        return iter(self.rge.row_cells(self._row, self.left, self.right))
+
+    def line_data(self):
+        return self.rge.row_data(self._row, self.left, self.right)
+
     def __len__(self):
         return self.right - self.left
 
@@ -228,6 +310,80 @@ BORDERS_VERTICAL = BORDER_RIGHT | BORDER_LEFT
 BORDERS_HORIZONTAL = BORDER_TOP | BORDER_BOTTOM
 
 
+class MergedCells(object):
+    """An index of the merged ranges of a sheet, given as (top, bottom,
+    left, right) with bottom and right excluded. The bounds of the
+    ranges split the rows in bands, and the ranges are kept in a
+    segment tree over those bands: a range is stored in the few nodes
+    whose bands it covers entirely, sorted by column. A lookup is a
+    bisection in each node from a band up to the root, and the index
+    grows with the number of ranges (times the depth of the tree), not
+    with their height or area.
+
+    Like a dict, it maps the cells covered by a range - except its top
+    left cell - to that top left cell."""
+
+    def __init__(self, ranges=()):
+        ranges = sorted(set(ranges), key=lambda rge: (rge[2], rge[0]))
+        self._bounds = sorted({rge[0] for rge in ranges} |
+                              {rge[1] for rge in ranges})
+        self._size = 1
+        while self._size < len(self._bounds):
+            self._size *= 2
+        nodes = collections.defaultdict(list)
+        for rge in ranges:
+            low = bisect.bisect_left(self._bounds, rge[0]) + self._size
+            high = bisect.bisect_left(self._bounds, rge[1]) + self._size
+            while low < high:
+                if low & 1:
+                    nodes[low].append(rge)
+                    low += 1
+                if high & 1:
+                    high -= 1
+                    nodes[high].append(rge)
+                low, high = low // 2, high // 2
+        self._nodes = {node: ([rge[2] for rge in node_ranges], node_ranges)
+                       for node, node_ranges in nodes.items()}
+        self._len = len(ranges)
+
+    def find(self, row, col):
+        """returns the range that contains the cell, or None"""
+        i = bisect.bisect_right(self._bounds, row) - 1
+        if i < 0:
+            return None
+        node = i + self._size
+        while node:
+            entry = self._nodes.get(node)
+            if entry is not None:
+                lefts, node_ranges = entry
+                j = bisect.bisect_right(lefts, col) - 1
+                if j >= 0 and col < node_ranges[j][3]:
+                    return node_ranges[j]
+            node //= 2
+        return None
+
+    def get(self, key, default=None):
+        rge = self.find(*key)
+        if rge is None or key == (rge[0], rge[2]):
+            return default
+        return rge[0], rge[2]
+
+    def __getitem__(self, key):
+        result = self.get(key)
+        if result is None:
+            raise KeyError(key)
+        return result
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return self._len
+
+    def __repr__(self):
+        return "<MergedCells %s ranges>" % self._len
+
+
 class SheetDocument(Document, metaclass=abc.ABCMeta):
     """Base class for sheets, to be implemented
     by a backend"""
@@ -274,6 +430,39 @@ class LazyModule(object):
         return getattr(self.module, attr)
 
 
+ZIP_MAGIC = b'PK\x03\x04'
+OLE2_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+PDF_MAGIC = b'%PDF'
+SNIFF_SIZE = 1024
+# the parts that tell the zip formats apart
+ZIP_FORMATS = [('xl/workbook.xml', '.xlsx'), ('xl/workbook.bin', '.xlsb'),
+               ('content.xml', '.ods')]
+
+
+def sniff_format(fp):
+    """returns the extension of the format of a binary file from its
+    first bytes, without moving in the file. Text without null bytes
+    is read as csv"""
+    position = fp.tell()
+    try:
+        head = fp.read(SNIFF_SIZE)
+        if head.startswith(ZIP_MAGIC):
+            fp.seek(position)
+            names = set(zipfile.ZipFile(fp).namelist())
+            for name, ext in ZIP_FORMATS:
+                if name in names:
+                    return ext
+        elif head.startswith(OLE2_MAGIC):
+            return '.xls'
+        elif head.startswith(PDF_MAGIC):
+            return '.pdf'
+        elif b'\0' not in head:
+            return '.csv'
+    finally:
+        fp.seek(position)
+    raise ConfigurationError("Unknown file format")
+
+
 class WorkbookReader(dict):
     """a callable object that will call the proper
     backend to read the file"""
@@ -282,20 +471,54 @@ class WorkbookReader(dict):
         _openpyxl = LazyModule('sheetparser.backends._openpyxl')
         _xlrd = LazyModule('sheetparser.backends._xlrd')
         _pdfminer = LazyModule('sheetparser.backends._pdfminer')
+        _csv = LazyModule('sheetparser.backends._csv')
+        _xlsx = LazyModule('sheetparser.backends._xlsx')
+        _ods = LazyModule('sheetparser.backends._ods')
+        _xlsb = LazyModule('sheetparser.backends._xlsb')
+        _calamine = LazyModule('sheetparser.backends._calamine')
+        _numpy = LazyModule('sheetparser.backends._numpy')
         self['.xls', True] = _xlrd
-        self['.xlsx', False] = _xlrd
-        self['.xlsm', False] = _xlrd
+        self['.xls', False] = _xlrd
+        self['.xlsx', False] = _xlsx
+        self['.xlsm', False] = _xlsx
         self['_xlrd'] = _xlrd
+        self['_xlsx'] = _xlsx
+        self['.ods', False] = _ods
+        self['.ods', True] = _ods
+        self['_ods'] = _ods
+        self['.xlsb', False] = _xlsb
+        self['_xlsb'] = _xlsb
+        self['_calamine'] = _calamine
+        self['_numpy'] = _numpy
 
         self['.xlsx', True] = _openpyxl
         self['.xlsm', True] = _openpyxl
         self['.pdf', False] = _pdfminer
         self['_openpyxl'] = _openpyxl
-
-    def __call__(self, filepath, with_formatting=False, with_backend=None):
+        self['.csv', False] = _csv
+        self['.tsv', False] = _csv
+        self['_csv'] = _csv
+
+    def __call__(self, filepath, with_formatting=False, with_backend=None,
+                 **options):
+        """opens the file with the backend registered for its
+        extension, or `with_backend`. A dict of arrays or DataFrames
+        is opened with the `_numpy` backend. The content of a file can
+        also be given as bytes, a memoryview, a mmap or a binary file
+        object: its format is then found from its first bytes. Other
+        keyword arguments are passed to the backend"""
         backend = None
-        if with_backend is None:
+        ext = None
+        if isinstance(filepath, collections.abc.Mapping):
+            if with_backend is None:
+                backend = self['_numpy']
+        elif isinstance(filepath, (str, os.PathLike)):
             __, ext = os.path.splitext(filepath)
+        else:
+            filepath = open_source(filepath)
+            if with_backend is None:
+                ext = sniff_format(filepath)
+        if with_backend is None and ext is not None:
             backend = self.get((ext, with_formatting), None)
         elif with_backend:
             if with_backend in self:
@@ -308,7 +531,8 @@ class WorkbookReader(dict):
                 " provides this functionality first")
         else:
             return backend.load_workbook(filepath,
-                                         with_formatting=with_formatting)
+                                         with_formatting=with_formatting,
+                                         **options)
 
 
 load_workbook = WorkbookReader()
@@ -241,6 +241,10 @@ class Match(object):
 
 def get_value(line):
     '''A transformer that converts a list of cells to a list of values'''
+    if hasattr(line, 'line_data'):
+        data = line.line_data()
+        return [EMPTY_CELL if merged else value
+                for value, merged in zip(data.values, data.merged)]
     return [c.value if not c.is_merged else EMPTY_CELL for c in line]
 
 
@@ -441,6 +445,12 @@ class GetValue(TableTransform):
         self.include_merged = include_merged
 
     def process_line(self, table, line):
+        if hasattr(line, 'line_data'):  # rows and columns of a sheet
+            data = line.line_data()
+            if self.include_merged:
+                return data.values
+            return [value for value, merged in zip(data.values, data.merged)
+                    if not merged]
         if self.include_merged:
             return [x.value for x in line]
         else:
@@ -14,11 +14,18 @@ from sheetparser import (CellRange, DoesntMatchException, Sheet, Many, Line, Pyt
 
 
 class LoadWorkbook:
+    load_options = {}
+
     def setUp(self):
         load_backend(self.backend)
         self.wbk = load_workbook(
             os.path.join(os.path.dirname(__file__), self.filename),
-            with_formatting=True)
+            with_formatting=True, **self.load_options)
+
+    def tearDown(self):
+        close = getattr(self.wbk, 'close', None)
+        if close is not None:
+            close()
 
 
 class TestReadSheetBase(LoadWorkbook):
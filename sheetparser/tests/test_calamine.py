@@ -0,0 +1,80 @@
+import unittest
+
+from sheetparser import ConfigurationError, VisibleRows
+from sheetparser.tests.common import *
+
+try:
+    import python_calamine
+except ImportError:
+    python_calamine = None
+
+
+class LoadCalamine(object):
+    backend = 'sheetparser.backends._calamine'
+
+    def setUp(self):
+        self.wbk = load_workbook(
+            os.path.join(os.path.dirname(__file__), self.filename),
+            with_backend='_calamine')
+
+
+@unittest.skipIf(python_calamine is None, 'python-calamine is not installed')
+class TestReadCalamine(LoadCalamine, unittest.TestCase):
+    filename = 'test_table1.xlsx'
+
+    def test_types(self):
+        sheet = self.wbk['Sheet8']
+        self.assertEqual(sheet.cell(0, 1).value, datetime.datetime(2017, 12, 1))
+        self.assertIs(type(sheet.cell(0, 1).value), datetime.datetime)
+        self.assertEqual(sheet.cell(1, 1).value, 1.12)
+        self.assertEqual(sheet.cell(3, 1).value, datetime.time(2, 30))
+
+    def test_empty(self):
+        sheet = self.wbk['Sheet1']
+        self.assertTrue(sheet.cell(0, 0).is_empty)
+        self.assertTrue(sheet.cell(100, 100).is_empty)
+        self.assertFalse(sheet.cell(1, 1).is_empty)
+        data = sheet.row_data(1, 0, 12)
+        self.assertEqual(data.values[:5], ['', 'table 1', 'a', 'b', 'c'])
+        self.assertEqual(data.empty, [value == '' for value in data.values])
+
+    def test_merged(self):
+        sheet = self.wbk['Sheet4']
+        self.assertFalse(sheet.cell(1, 1).is_merged)
+        self.assertTrue(sheet.cell(1, 3).is_merged)
+        self.assertEqual(sheet.cell(1, 3).value, 2017)
+
+    def test_options(self):
+        filename = os.path.join(os.path.dirname(__file__), self.filename)
+        # calamine is only used when selected
+        wbk = load_workbook(filename)
+        self.assertEqual(type(wbk).__name__, 'xlsxWorkbook')
+        wbk.close()
+        # the options that tune the other backends are accepted
+        for options in [{'window': 4}, {'on_demand': True}]:
+            wbk = load_workbook(filename, with_backend='_calamine', **options)
+            self.assertEqual(wbk['Sheet8'].cell(1, 1).value, 1.12)
+            wbk.close()
+        for options in [{'read_only': True}, {'delimiter': ';'}, {'windw': 4}]:
+            with self.assertRaises(ConfigurationError):
+                load_workbook(filename, with_backend='_calamine', **options)
+
+    def test_visible_rows(self):
+        sheet = self.wbk['Sheet1']
+        self.assertFalse(sheet.is_hidden_row(1))
+        context = PythonObjectContext()
+        Sheet('sheet', VisibleRows, Empty, Table).match_range(sheet, context)
+
+
+@unittest.skipIf(python_calamine is None, 'python-calamine is not installed')
+class TestSimplePatternCalamine(LoadCalamine, TestSimplePattern, unittest.TestCase):
+    filename = 'test_table1.xlsx'
+
+
+@unittest.skipIf(python_calamine is None, 'python-calamine is not installed')
+class TestSimplePatternCalamineXls(LoadCalamine, TestSimplePattern, unittest.TestCase):
+    filename = 'test_table1.xls'
+
+
+if __name__ == '__main__':
+    unittest.main()
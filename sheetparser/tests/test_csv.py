@@ -0,0 +1,117 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from sheetparser import (CellRange, ConfigurationError, Empty, Line,
+                         PythonObjectContext, Rows, Sheet, Table, VisibleRows,
+                         Workbook, get_value, load_workbook)
+from sheetparser.backends import _array
+
+TABLE = '''\
+a11,b11,c11
+a21,b21,c21
+
+line1
+line2
+'''
+
+
+class TestCsv(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.write('table.csv', TABLE)
+        self.write('other.tsv', 'x\t"y\nz"\n\t1\n')
+        self.write('notes.md', 'ignored')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, text, encoding='utf-8'):
+        with open(os.path.join(self.directory, name), 'w',
+                  encoding=encoding, newline='') as f:
+            f.write(text)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def test_directory(self):
+        wbk = load_workbook(self.directory, with_backend='_csv')
+        self.assertEqual([sheet.name for sheet in wbk], ['other', 'table'])
+        sheet = wbk['other']
+        self.assertEqual((sheet.height, sheet.width), (2, 2))
+        self.assertEqual(sheet.cell(0, 1).value, 'y\nz')
+        self.assertTrue(sheet.cell(1, 0).is_empty)
+        self.assertEqual(sheet.cell(1, 1).value, '1')
+        sheet.close()
+
+    def test_pattern(self):
+        wbk = load_workbook(self.path('table.csv'))
+        pattern = Workbook({'table': Sheet('sheet', Rows,
+                                           Table, Empty, Line, Line)})
+        context = PythonObjectContext()
+        pattern.match_workbook(wbk, context)
+        self.assertEqual(context[0].table.data[0][1], 'c21')
+        self.assertEqual(context[0].line_1[0], 'line2')
+
+    def test_window(self):
+        self.write('long.csv', ''.join('%d,"a\n%d"\n' % (i, i) for i in range(50)))
+        for use_mmap in (False, True):
+            sheet = load_workbook(self.path('long.csv'), window=4,
+                                  use_mmap=use_mmap)['long']
+            self.assertEqual(sheet.height, 50)
+            for row in [0, 1, 30, 2, 49, 10, 11, 50]:
+                expected = ['%d' % row, 'a\n%d' % row] if row < 50 else ['', '']
+                self.assertEqual(get_value(next(CellRange(sheet, row, 0, row + 1, 2).rows())),
+                                 expected)
+                self.assertEqual(sheet.cell(row, 0).value, expected[0])
+            sheet.close()
+
+    def test_options(self):
+        self.write('latin.csv', 'caf\xe9;1\n', encoding='latin-1')
+        sheet = load_workbook(self.path('latin.csv'), encoding='latin-1',
+                              delimiter=';')['latin']
+        self.assertEqual(sheet.cell(0, 0).value, 'caf\xe9')
+        sheet.close()
+        wbk = _array.load_workbook(self.path('latin.csv'),
+                                   {'encoding': 'latin-1', 'dialect': 'excel'})
+        self.assertEqual([sheet.name for sheet in wbk], [1])
+        sheet = wbk[1]
+        self.assertEqual(sheet.cell(0, 0).value, 'caf\xe9;1')
+        sheet.close()
+
+    @unittest.skipUnless(os.path.isdir('/proc/self/fd'), 'needs /proc')
+    def test_no_open_file(self):
+        self.write('long.csv', ''.join('%d\n' % i for i in range(50)))
+        before = len(os.listdir('/proc/self/fd'))
+        for use_mmap in (False, True):
+            sheets = [load_workbook(self.path('long.csv'), window=4,
+                                    use_mmap=use_mmap)[0],
+                      _array.load_workbook(self.path('long.csv'))[1]]
+            for sheet in sheets:
+                self.assertEqual([sheet.cell(row, 0).value for row in (30, 3, 49)],
+                                 ['30', '3', '49'])
+                self.assertEqual(len(os.listdir('/proc/self/fd')), before)
+
+    def test_visible_rows(self):
+        wbk = load_workbook(self.path('table.csv'))
+        self.assertFalse(wbk[0].is_hidden_row(0))
+        pattern = Workbook({'table': Sheet('sheet', VisibleRows, Table, Empty)})
+        context = PythonObjectContext()
+        pattern.match_workbook(wbk, context)
+        self.assertEqual(context[0].table.data[0][1], 'c21')
+
+    def test_line_endings(self):
+        self.write('windows.csv', TABLE.replace('\n', '\r\n'))
+        sheet = load_workbook(self.path('windows.csv'))[0]
+        self.assertEqual((sheet.height, sheet.cell(1, 2).value), (5, 'c21'))
+        sheet.close()
+        self.write('mac.csv', TABLE.replace('\n', '\r'))
+        sheet = load_workbook(self.path('mac.csv'))[0]
+        self.assertRaises(ConfigurationError, lambda: sheet.height)
+        sheet.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
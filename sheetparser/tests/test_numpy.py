@@ -0,0 +1,161 @@
+import unittest
+
+import numpy as np
+
+from sheetparser.tests.common import *
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+
+def read_arrays(filename):
+    """the values of the sheets of a file as object arrays, with None
+    for the empty cells"""
+    wbk = load_workbook(os.path.join(os.path.dirname(__file__), filename),
+                        with_backend='_xlsx')
+    arrays = {}
+    for sheet in wbk:
+        values = np.empty((sheet.bottom, sheet.right), dtype=object)
+        for row in range(sheet.bottom):
+            data = sheet.row_data(row, 0, sheet.right)
+            values[row] = [None if empty else value
+                           for value, empty in zip(data.values, data.empty)]
+        arrays[sheet.name] = values
+    return arrays
+
+
+class TestSimplePatternNumpy(TestSimplePattern, unittest.TestCase):
+    def setUp(self):
+        self.wbk = load_workbook(read_arrays('test_table1.xlsx'))
+
+
+class TestNumpy(unittest.TestCase):
+    def test_zero_copy(self):
+        values = np.arange(12.).reshape(3, 4)
+        sheet = load_workbook({'values': values})['values']
+        self.assertIs(sheet.blocks[0][0], values)
+        values[1, 2] = 42
+        self.assertEqual(sheet.cell(1, 2).value, 42)
+
+    def test_empty(self):
+        values = np.array([[1.5, np.nan, 'a'], ['', None, 2]], dtype=object)
+        sheet = load_workbook({'values': values})[0]
+        self.assertEqual((sheet.bottom, sheet.right), (2, 3))
+        data = sheet.row_data(0, 0, 4)
+        self.assertEqual(data.values, [1.5, '', 'a', ''])
+        self.assertEqual(data.empty, [False, True, False, True])
+        data = sheet.col_data(1, 0, 2)
+        self.assertEqual(data.values, ['', ''])
+        self.assertEqual(data.empty, [True, True])
+        self.assertTrue(sheet.cell(1, 0).is_empty)
+        self.assertFalse(sheet.cell(1, 2).is_empty)
+        self.assertTrue(sheet.cell(5, 5).is_empty)
+        self.assertTrue(empty_line(CellRange(sheet, 0, 1, 2, 2).rows().__next__()))
+
+    def test_missing_value(self):
+        class Missing(object):
+            """compares like pandas.NA"""
+            def __eq__(self, other):
+                return self
+
+            __ne__ = __eq__
+
+            def __bool__(self):
+                raise TypeError('boolean value of NA is ambiguous')
+
+            __hash__ = object.__hash__
+
+        values = np.array([[Missing(), 'a', np.nan]], dtype=object)
+        sheet = load_workbook({'values': values})[0]
+        self.assertEqual(sheet.row_data(0, 0, 3).empty, [True, False, True])
+
+    def test_types(self):
+        dates = np.array([['2017-12-01', 'NaT']], dtype='datetime64[ns]')
+        numbers = np.array([[np.nan, 1.12]])
+        wbk = load_workbook({'dates': dates, 'numbers': numbers})
+        sheet = wbk['dates']
+        self.assertEqual(sheet.cell(0, 0).value, datetime.datetime(2017, 12, 1))
+        self.assertEqual(sheet.row_data(0, 0, 2).values,
+                         [datetime.datetime(2017, 12, 1), ''])
+        sheet = wbk['numbers']
+        self.assertEqual(sheet.row_data(0, 0, 2).values, ['', 1.12])
+        self.assertIs(type(sheet.cell(0, 1).value), float)
+
+    def test_pattern(self):
+        values = np.array([['name', 'value'], ['a', 1.5], [None, np.nan],
+                           ['', 3.]], dtype=object)
+        pattern = Workbook({'values': Sheet('sheet', Rows, Table)})
+        context = ListContext()
+        pattern.match_workbook(load_workbook({'values': values}), context)
+        table = context.root['table'][0]
+        self.assertEqual(table.top_headers, [['value']])
+        self.assertEqual(table.left_headers, [['a']])
+        self.assertEqual(table.data, [[1.5]])
+
+    def test_int_keys(self):
+        wbk = load_workbook({1: np.array([['a']], dtype=object),
+                             2: np.array([['name', 'value'], ['b', 1.5]], dtype=object)})
+        self.assertEqual(wbk[2].cell(1, 0).value, 'b')
+        self.assertEqual(wbk[1].cell(0, 0).value, 'a')
+        self.assertEqual(wbk[0].name, 1)
+        pattern = Workbook({2: Sheet('sheet', Rows, Table)})
+        context = ListContext()
+        pattern.match_workbook(wbk, context)
+        self.assertEqual(context.root['table'][0].data, [[1.5]])
+
+    def test_dimensions(self):
+        with self.assertRaises(ValueError):
+            list(load_workbook({'values': np.arange(3)}))
+
+
+@unittest.skipIf(pd is None, 'pandas is not installed')
+class TestDataFrame(unittest.TestCase):
+    def setUp(self):
+        self.frame = pd.DataFrame({
+            'name': ['a', None, ''],
+            'value': [1.5, np.nan, 3.],
+            'date': pd.to_datetime(['2017-12-01', None, '2018-01-01'])},
+            index=pd.Index([10, 11, 12], name='id'))
+
+    def test_frame(self):
+        sheet = load_workbook({'frame': self.frame})['frame']
+        self.assertEqual((sheet.bottom, sheet.right), (4, 3))
+        self.assertEqual(sheet.row_data(0, 0, 3).values, ['name', 'value', 'date'])
+        self.assertEqual(sheet.row_data(2, 0, 3).values, ['', '', ''])
+        self.assertEqual(sheet.row_data(2, 0, 3).empty, [True, True, True])
+        self.assertEqual(sheet.col_data(2, 0, 4).values,
+                         ['date', datetime.datetime(2017, 12, 1), '',
+                          datetime.datetime(2018, 1, 1)])
+        self.assertTrue(np.shares_memory(sheet.blocks[1][0],
+                                         self.frame['value'].to_numpy()))
+
+    def test_nullable(self):
+        frame = pd.DataFrame({'count': pd.array([1, None, 3], dtype='Int64'),
+                              'name': pd.array(['a', None, ''], dtype='string')})
+        sheet = load_workbook({'frame': frame}, header=False)[0]
+        self.assertEqual(sheet.col_data(0, 0, 3).empty, [False, True, False])
+        self.assertEqual(sheet.col_data(1, 0, 3).empty, [False, True, True])
+        self.assertEqual(sheet.row_data(1, 0, 2).values, ['', ''])
+        values = frame.to_numpy()
+        self.assertEqual(load_workbook({'values': values})[0].row_data(1, 0, 2).empty,
+                         [True, True])
+
+    def test_index(self):
+        sheet = load_workbook({'frame': self.frame}, header=False, index=True)[0]
+        self.assertEqual((sheet.bottom, sheet.right), (3, 4))
+        self.assertEqual(sheet.row_data(0, 0, 3).values, [10, 'a', 1.5])
+
+    def test_pattern(self):
+        pattern = Workbook({'frame': Sheet('sheet', Rows, Table)})
+        context = ListContext()
+        pattern.match_workbook(load_workbook({'frame': self.frame}), context)
+        table = context.root['table'][0]
+        self.assertEqual(table.top_headers, [['value', 'date']])
+        self.assertEqual(table.left_headers, [['a']])
+        self.assertEqual(table.data, [[1.5, datetime.datetime(2017, 12, 1)]])
+
+
+if __name__ == '__main__':
+    unittest.main()
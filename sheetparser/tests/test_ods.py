@@ -0,0 +1,199 @@
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+from sheetparser import (BORDER_BOTTOM, BORDER_TOP, BORDERS_VERTICAL, Empty,
+                         Line, PythonObjectContext, Rows, Sheet, Table, Workbook, load_workbook)
+from sheetparser.backends._ods import parse_duration
+from sheetparser.patterns import VisibleRows
+
+CONTENT = '''<?xml version="1.0" encoding="UTF-8"?>
+<office:document-content
+    xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0"
+    xmlns:style="urn:oasis:names:tc:opendocument:xmlns:style:1.0"
+    xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0"
+    xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0"
+    xmlns:fo="urn:oasis:names:tc:opendocument:xmlns:xsl-fo-compatible:1.0">
+ <office:automatic-styles>
+  <style:style style:name="ta2" style:family="table">
+   <style:table-properties table:display="false"/>
+  </style:style>
+  <style:style style:name="ce1" style:family="table-cell">
+   <style:table-cell-properties fo:background-color="#ffff00"
+       fo:border-left="0.06pt solid #000000" fo:border-right="none"
+       fo:border-top="none" fo:border-bottom="none"/>
+  </style:style>
+ </office:automatic-styles>
+ <office:body>
+  <office:spreadsheet>
+   <table:table table:name="Sheet1">
+    <table:table-column table:number-columns-repeated="1024"/>
+    <table:table-row>
+     <table:table-cell office:value-type="string"><text:p>table 1</text:p></table:table-cell>
+     <table:table-cell office:value-type="string"><text:p>a</text:p></table:table-cell>
+     <table:table-cell office:value-type="string"><text:p>b</text:p></table:table-cell>
+     <table:table-cell table:number-columns-repeated="1021"/>
+    </table:table-row>
+    <table:table-row>
+     <table:table-cell office:value-type="float" office:value="1"><text:p>1</text:p></table:table-cell>
+     <table:table-cell table:style-name="ce1" office:value-type="string"><text:p>a<text:s text:c="2"/>11</text:p></table:table-cell>
+     <table:table-cell office:value-type="float" office:value="1.5"><text:p>1.5</text:p></table:table-cell>
+     <table:table-cell table:number-columns-repeated="1021"/>
+    </table:table-row>
+    <table:table-row table:number-rows-repeated="2">
+     <table:table-cell table:number-columns-repeated="1024"/>
+    </table:table-row>
+    <table:table-row table:visibility="collapse">
+     <table:table-cell office:value-type="string"><text:p>hidden</text:p></table:table-cell>
+    </table:table-row>
+    <table:table-row>
+     <table:table-cell table:number-columns-spanned="2" table:number-rows-spanned="2"
+         office:value-type="date" office:date-value="2017-12-01"><text:p>01/12/17</text:p></table:table-cell>
+     <table:covered-table-cell/>
+     <table:table-cell office:value-type="time" office:time-value="PT02H30M00S"><text:p>02:30</text:p></table:table-cell>
+    </table:table-row>
+    <table:table-row>
+     <table:covered-table-cell table:number-columns-repeated="2"/>
+     <table:table-cell office:value-type="boolean" office:boolean-value="true"><text:p>TRUE</text:p></table:table-cell>
+    </table:table-row>
+    <table:table-row table:number-rows-repeated="1048568">
+     <table:table-cell table:number-columns-repeated="1024"/>
+    </table:table-row>
+   </table:table>
+   <table:table table:name="Hidden" table:style-name="ta2">
+    <table:table-row>
+     <table:table-cell office:value-type="string"><text:p>x</text:p></table:table-cell>
+    </table:table-row>
+   </table:table>
+  </office:spreadsheet>
+ </office:body>
+</office:document-content>
+'''
+
+NAMESPACES = '''
+    xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0"
+    xmlns:style="urn:oasis:names:tc:opendocument:xmlns:style:1.0"
+    xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0"
+    xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0"
+    xmlns:fo="urn:oasis:names:tc:opendocument:xmlns:xsl-fo-compatible:1.0"'''
+
+STYLES = '''<?xml version="1.0" encoding="UTF-8"?>
+<office:document-styles%s>
+ <office:styles>
+  <style:default-style style:family="table-cell">
+   <style:table-cell-properties fo:border-bottom="0.06pt solid #000000"/>
+  </style:default-style>
+  <style:style style:name="Header" style:family="table-cell">
+   <style:table-cell-properties fo:background-color="#ff0000"/>
+  </style:style>
+  <style:style style:name="Header" style:family="paragraph"/>
+ </office:styles>
+</office:document-styles>
+''' % NAMESPACES
+
+STYLED_CONTENT = '''<?xml version="1.0" encoding="UTF-8"?>
+<office:document-content%s>
+ <office:automatic-styles>
+  <style:style style:name="ce1" style:family="table-cell" style:parent-style-name="Header">
+   <style:table-cell-properties fo:border-bottom="none" fo:border-top="0.06pt solid #000000"/>
+  </style:style>
+ </office:automatic-styles>
+ <office:body>
+  <office:spreadsheet>
+   <table:table table:name="Sheet1">
+    <table:table-column/>
+    <table:table-column table:default-cell-style-name="Header"/>
+    <table:table-row>
+     <table:table-cell table:style-name="ce1" office:value-type="string">
+      <office:annotation><text:p>a comment</text:p></office:annotation>
+      <text:p>a</text:p>
+     </table:table-cell>
+     <table:table-cell/>
+    </table:table-row>
+   </table:table>
+  </office:spreadsheet>
+ </office:body>
+</office:document-content>
+''' % NAMESPACES
+
+
+class TestOds(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'test.ods')
+        with zipfile.ZipFile(self.filename, 'w') as zfile:
+            zfile.writestr('mimetype', 'application/vnd.oasis.opendocument.spreadsheet')
+            zfile.writestr('content.xml', CONTENT)
+        self.wbk = load_workbook(self.filename, with_formatting=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_read(self):
+        sheet = self.wbk['Sheet1']
+        self.assertEqual((sheet.height, sheet.width), (7, 3))
+        self.assertEqual([sheet.cell(1, col).value for col in range(4)],
+                         [1, 'a  11', 1.5, ''])
+        self.assertTrue(sheet.cell(2, 1).is_empty)
+        self.assertTrue(sheet.cell(1000, 1000).is_empty)
+        self.assertEqual(sheet.cell(5, 2).value, datetime.time(2, 30))
+        self.assertIs(sheet.cell(6, 2).value, True)
+
+    def test_durations(self):
+        self.assertEqual(parse_duration('PT02H30M00S'), datetime.time(2, 30))
+        self.assertEqual(parse_duration('PT36H'), datetime.timedelta(hours=36))
+        self.assertEqual(parse_duration('PT24H00M00S'), datetime.timedelta(days=1))
+        self.assertEqual(parse_duration('-PT01H30M'), -datetime.timedelta(minutes=90))
+        self.assertEqual(parse_duration('P1DT12H'), datetime.timedelta(hours=36))
+        self.assertEqual(parse_duration('PT1H1'), 'PT1H1')
+
+    def test_merged(self):
+        sheet = self.wbk['Sheet1']
+        self.assertFalse(sheet.cell(5, 0).is_merged)
+        for row, col in [(5, 1), (6, 0), (6, 1)]:
+            cell = sheet.cell(row, col)
+            self.assertTrue(cell.is_merged)
+            self.assertEqual(cell.value, datetime.datetime(2017, 12, 1))
+        self.assertFalse(sheet.cell(6, 2).is_merged)
+
+    def test_hidden(self):
+        sheet = self.wbk['Sheet1']
+        self.assertTrue(sheet.is_hidden_row(4))
+        self.assertFalse(sheet.is_hidden_row(3))
+        self.assertEqual(len(list(VisibleRows().iter_doc(sheet))), 6)
+        self.assertEqual([s.is_hidden() for s in self.wbk], [False, True])
+
+    def test_formatting(self):
+        cell = self.wbk['Sheet1'].cell(1, 1)
+        self.assertTrue(cell.has_borders(BORDERS_VERTICAL))
+        self.assertEqual(cell.fill.color1, (255, 255, 0))
+        self.assertFalse(self.wbk['Sheet1'].cell(1, 0).is_filled)
+
+    def test_styles(self):
+        filename = os.path.join(self.directory, 'styled.ods')
+        with zipfile.ZipFile(filename, 'w') as zfile:
+            zfile.writestr('content.xml', STYLED_CONTENT)
+            zfile.writestr('styles.xml', STYLES)
+        sheet = load_workbook(filename, with_formatting=True)['Sheet1']
+        cell = sheet.cell(0, 0)
+        self.assertEqual(cell.value, 'a')
+        self.assertEqual(cell.fill.color1, (255, 0, 0))
+        self.assertTrue(cell.has_borders(BORDER_TOP))
+        self.assertFalse(cell.has_borders(BORDER_BOTTOM))
+        self.assertEqual(sheet.cell(0, 1).fill.color1, (255, 0, 0))
+        self.assertTrue(sheet.cell(0, 2).has_borders(BORDER_BOTTOM))
+        self.assertFalse(sheet.cell(0, 2).is_filled)
+
+    def test_pattern(self):
+        pattern = Workbook({'Sheet1': Sheet('sheet', Rows, Table, Empty)})
+        context = PythonObjectContext()
+        pattern.match_workbook(self.wbk, context)
+        self.assertEqual(context[0].table.top_headers, [['a', 'b']])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,10 @@
-import unittest
+import re
 import sys
+import tempfile
+import unittest
+import zipfile
+
+import openpyxl
 sys.path.append('.')
 
 
@@ -33,6 +38,37 @@ class TestReadFormatOX(TestFormat, unittest.TestCase):
         test = [l[0].value for l in VisibleRows().iter_doc(sheet)]
         self.assertEqual(test, ['With hidden rows', '', 'Table 1', 'a1', 'a4', ''])
 
+    def test_shared_formatting(self):
+        sheet = self.wbk['Sheet7']
+        self.assertIs(sheet.cell(0, 0).formatting, sheet.cell(1, 0).formatting)
+        self.assertIs(sheet.cell(0, 7).fill, self.wbk['Sheet7'].cell(0, 7).fill)
+        self.assertIsNot(sheet.cell(0, 0).formatting, sheet.cell(0, 7).formatting)
+
+    def test_snapshot(self):
+        if self.wbk.read_only:
+            self.skipTest('read-only workbook')
+        sheet = self.wbk['Sheet6']
+        values = [[sheet.cell(row, col).value for col in range(sheet.width + 5)]
+                  for row in range(sheet.height + 5)]
+        self.assertEqual(values[-1], [''] * (sheet.width + 5))
+        self.assertIsNone(self.wbk._wbk_fmt)
+        self.assertTrue(all(len(row) <= sheet.width for row in sheet.data))
+
+    def test_closed(self):
+        if self.wbk.read_only:
+            self.skipTest('read-only workbook')
+        # the sheets are snapshots: the file is closed once opened
+        self.assertIsNone(self.wbk.wbk._archive.fp)
+        self.assertEqual(self.wbk['Sheet1'].cell(1, 1).value, 'table 1')
+
+    def test_write_back(self):
+        if self.wbk.read_only:
+            self.skipTest('read-only workbook')
+        sheet = self.wbk['Sheet1']
+        sheet.cell(0, 0).set_value('written')
+        self.assertEqual(self.wbk.wbk_fmt['Sheet1'].cell(row=1, column=1).value,
+                         'written')
+
 
 class TestSimplePatternOX(TestSimplePattern, unittest.TestCase):
     backend = 'sheetparser.backends._openpyxl'
@@ -43,5 +79,56 @@ class TestComplexOX(TestComplex, unittest.TestCase):
     backend = 'sheetparser.backends._openpyxl'
     filename = 'test_table1.xlsx'
 
+
+class TestReadSheetOXReadOnly(TestReadSheetOX):
+    load_options = {'read_only': True}
+
+
+class TestReadFormatOXReadOnly(TestReadFormatOX):
+    load_options = {'read_only': True}
+
+
+class TestSimplePatternOXReadOnly(TestSimplePatternOX):
+    load_options = {'read_only': True}
+
+
+class TestComplexOXReadOnly(TestComplexOX):
+    load_options = {'read_only': True, 'window': 2}
+
+    def test_window(self):
+        sheet = self.wbk['Sheet1']
+        values = [[sheet.cell(row, col).value for col in range(sheet.width)]
+                  for row in range(sheet.height)]
+        for row in reversed(range(sheet.height)):
+            self.assertEqual([sheet.cell(row, col).value for col in range(sheet.width)],
+                             values[row])
+        self.assertLessEqual(len(sheet._rows), 2)
+
+
+class TestDimensionOX(unittest.TestCase):
+    def test_stale_dimension(self):
+        wb = openpyxl.Workbook()
+        for row in range(5):
+            wb.active.append([row, 'x' * row])
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'generated.xlsx')
+            wb.save(filename)
+            # rewrite the sheet with a <dimension> that says A1
+            with zipfile.ZipFile(filename) as zfile:
+                parts = {name: zfile.read(name) for name in zfile.namelist()}
+            name = 'xl/worksheets/sheet1.xml'
+            parts[name] = re.sub(rb'<dimension ref="[^"]*"', b'<dimension ref="A1"',
+                                 parts[name])
+            with zipfile.ZipFile(filename, 'w') as zfile:
+                for part, content in parts.items():
+                    zfile.writestr(part, content)
+            with load_workbook(filename, with_backend='_openpyxl',
+                               read_only=True) as wbk:
+                sheet = wbk[0]
+                self.assertEqual((sheet.height, sheet.width), (5, 2))
+                self.assertEqual(sheet.cell(4, 1).value, 'xxxx')
+            self.assertIsNone(wbk.wbk._archive.fp)
+
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -1,4 +1,8 @@
+import contextlib
+import io
+import math
 import os
+import tempfile
 from re import M
 import unittest
 import sys
@@ -9,6 +13,12 @@ from sheetparser import (Sheet, Line, PythonObjectContext,
                          load_workbook, Rows,
                          Table, Empty, Workbook
                          )
+from sheetparser.backends._pdfminer import (CellIndex, Interval,
+                                            IntervalIndex, LayoutCache, Page,
+                                            PdfTable, Position, TextFrame,
+                                            main, pdf2excel_batch, read_pdf)
+
+FILENAME = os.path.join(os.path.dirname(__file__), 'test_table1.pdf')
 
 
 class TestPdf(unittest.TestCase):
@@ -25,6 +35,200 @@ class TestPdf(unittest.TestCase):
         self.assertEqual(context[0].table.data[0][0], 'a11')
         self.assertEqual(context[0].line_1[0], 'line2')
 
+    def test_lazy(self):
+        wbk = load_workbook(FILENAME, lazy=True)
+        pattern = Workbook(
+            {2: Sheet('sheet', Rows,
+                      Table, Empty, Table, Empty,
+                      Line, Line)
+             })
+        context = PythonObjectContext()
+        pattern.match_workbook(wbk, context)
+        self.assertEqual(context[0].table.data[0][0], 'a11')
+        self.assertEqual(sorted(wbk.tables), [2])
+        self.assertIs(wbk[2].data, wbk[2].data)
+        self.assertEqual(len(wbk), 6)
+        self.assertEqual(wbk.data, load_workbook(FILENAME).data)
+        wbk.close()
+
+    def test_stream(self):
+        wbk = load_workbook(FILENAME, stream=True)
+        pattern = Workbook(
+            {2: Sheet('sheet', Rows,
+                      Table, Empty, Table, Empty,
+                      Line, Line)
+             })
+        context = PythonObjectContext()
+        pattern.match_workbook(wbk, context)
+        self.assertEqual(context[0].table.data[0][0], 'a11')
+        tables = load_workbook(FILENAME).data
+        self.assertEqual({sheet.name: sheet.data for sheet in wbk}, tables)
+        self.assertEqual(wbk[4].data, tables[4])
+        self.assertRaises(KeyError, wbk.__getitem__, 7)
+        self.assertEqual(len(wbk), 6)
+        wbk.close()
+
+    def test_grid(self):
+        tables = load_workbook(FILENAME).data
+        grid = load_workbook(FILENAME, grid=True).data
+        self.assertEqual(sorted(grid), sorted(tables))
+        for pageno in range(1, 6):
+            self.assertEqual(grid[pageno], tables[pageno])
+        wbk = load_workbook(FILENAME, stream=True, grid=True)
+        self.assertEqual(wbk[6].data, grid[6])
+        wbk.close()
+
+    def test_geometry(self):
+        for options in [{}, {'lazy': True}, {'stream': True}]:
+            wbk = load_workbook(FILENAME, **options)
+            sheet = wbk[6]
+            self.assertFalse(sheet.is_hidden_row(0))
+            row, col = sheet.find_text('Yet another table')
+            x0, y0, x1, y1 = sheet.cell_box(row, col)
+            self.assertLess(x0, x1)
+            self.assertIsNone(sheet.cell_box(row, col + 1))
+            self.assertIn((row, col), sheet.cells_in(x0, y0, x0 + 1, y0 + 1))
+            rge = sheet.below(row, col)
+            self.assertEqual(rge.top, row + 1)
+            self.assertEqual(rge.cell(0, 0).value, 'product 1')
+            self.assertEqual(rge.bottom, len(sheet.data))
+            wbk.close()
+
+    def test_pdf2excel_batch(self):
+        tables = load_workbook(FILENAME).data
+        with tempfile.TemporaryDirectory() as directory:
+            inputs = os.path.join(directory, 'in')
+            os.makedirs(os.path.join(inputs, 'sub'))
+            with open(FILENAME, 'rb') as f:
+                content = f.read()
+            for name in ['a.pdf', os.path.join('sub', 'b.PDF')]:
+                with open(os.path.join(inputs, name), 'wb') as f:
+                    f.write(content)
+            with open(os.path.join(inputs, 'broken.pdf'), 'wb') as f:
+                f.write(b'%PDF-1.4 not a pdf')
+            output = os.path.join(directory, 'out')
+            conversions = sorted(pdf2excel_batch([inputs], output, workers=1))
+            self.assertEqual([os.path.basename(c.target) for c in conversions],
+                             ['a.xlsx', 'broken.xlsx', 'b.xlsx'])
+            self.assertEqual([c.pages for c in conversions], [6, 0, 6])
+            self.assertIsNone(conversions[0].error)
+            self.assertIsNotNone(conversions[1].error)
+            wbk = load_workbook(os.path.join(output, 'b.xlsx'))
+            self.assertEqual(len(list(wbk)), 6)
+            self.assertEqual(wbk[1].cell(0, 0).value, tables[2][0][0])
+            conversions = list(pdf2excel_batch([os.path.join(inputs, '*.pdf')],
+                                               output, workers=2))
+            self.assertEqual(len(conversions), 2)
+            with contextlib.redirect_stdout(io.StringIO()) as out:
+                self.assertEqual(main([inputs, '-o', output, '-j', '1']), 1)
+            self.assertIn('2 files converted, 1 failed', out.getvalue())
+
+    def test_page_numbers(self):
+        with open(FILENAME, 'rb') as f:
+            tables = read_pdf(f, '', 2, 4)
+        with open(FILENAME, 'rb') as f:
+            all_tables = read_pdf(f)
+        self.assertEqual(sorted(tables), [2, 4])
+        self.assertEqual(tables[2], all_tables[2])
+        self.assertEqual(tables[4], all_tables[4])
+
+    def test_workers(self):
+        wbk = load_workbook(FILENAME)
+        parallel = load_workbook(FILENAME, workers=2)
+        self.assertEqual(parallel.data, wbk.data)
+        with open(FILENAME, 'rb') as f:
+            self.assertEqual(load_workbook(f.read(), workers=2).data, wbk.data)
+        with open(FILENAME, 'rb') as f:
+            self.assertEqual(load_workbook(f, workers=2).data, wbk.data)
+
+    def test_cache(self):
+        tables = load_workbook(FILENAME).data
+        with tempfile.TemporaryDirectory() as directory:
+            wbk = load_workbook(FILENAME, cache_dir=directory, cache_frames=True)
+            self.assertEqual(wbk.data, tables)
+            cache = LayoutCache.for_file(directory, FILENAME, True)
+            self.assertEqual(cache.get(2)['table'], tables[2])
+            frames = cache.get_frames(2)
+            self.assertEqual(PdfTable(frames).get_table(), tables[2])
+            # the cached tables are used instead of the pages
+            cache = LayoutCache.for_file(directory, FILENAME)
+            cache.set(3, [['cached']], [[None]])
+            with open(FILENAME, 'rb') as f:
+                self.assertEqual(read_pdf(f, '', cache=cache)[3], [['cached']])
+                f.seek(0)
+                wbk = load_workbook(f, cache_dir=directory, lazy=True)
+                self.assertEqual(wbk[3].data, [['cached']])
+            self.assertIsNone(LayoutCache(directory, 'other').get(2))
+
+
+class TestPage(unittest.TestCase):
+    def test_add_frame(self):
+        page = Page()
+        cells = [(x, y) for y in range(10) for x in range(4)]
+        for x, y in reversed(cells[1::2] + cells[::2]):
+            page.add_text(TextFrame(Position(x * 50, 500 - y * 12, x * 50 + 15,
+                                             510 - y * 12), 'c%d%d' % (y, x)))
+        # a frame overlapping the second line
+        page.add_text(TextFrame(Position(220, 489, 225, 497), 'x'))
+        self.assertEqual(len(page.aligned_frames), 10)
+        table = PdfTable(page.aligned_frames).get_table()
+        self.assertEqual(table[0], ['c00', 'c01', 'c02', 'c03', ''])
+        self.assertEqual(table[1], ['c10', 'c11', 'c12', 'c13', 'x'])
+        self.assertEqual(table[9][3], 'c93')
+
+    def test_merge_margin(self):
+        page = Page()
+        for x, text in [(0, 'label'), (52, 'a'), (58, 'b'), (100, 'value')]:
+            page.add_text(TextFrame(Position(x, 500, x + (40 if len(text) > 1 else 4),
+                                             510), text))
+        pdf_table = PdfTable(page.aligned_frames)
+        self.assertEqual(len(pdf_table.columns), 4)
+        self.assertIs(pdf_table.merge_margin(), pdf_table)
+        self.assertEqual(len(pdf_table.columns), 3)
+        self.assertEqual([text.strip() for text in pdf_table.get_table()[0]],
+                         ['label', 'ab', 'value'])
+
+
+class TestIntervalIndex(unittest.TestCase):
+    def test_sorted(self):
+        index = IntervalIndex([Interval(0, 10), Interval(20, 30)])
+        index.insort(Interval(12, 18))
+        self.assertTrue(index.is_sorted)
+        self.assertEqual(index.lefts, [0, 12, 20])
+        self.assertEqual(index.overlapping(Interval(5, 25)), [0, 1, 2])
+        self.assertEqual(index.overlapping(Interval(10, 12)), [])
+        self.assertEqual(index.first_overlapping(Interval(15, 40)), 1)
+        index.restrict(2, Interval(25, 40))
+        self.assertEqual((index.lefts[2], index.rights[2]), (25, 30))
+
+    def test_overlapping(self):
+        index = IntervalIndex([Interval(0, 10), Interval(5, 10)])
+        self.assertFalse(index.is_sorted)
+        self.assertEqual(index.overlapping(Interval(6, 7)), [0, 1])
+        self.assertEqual(index.first_overlapping(Interval(6, 7)), 0)
+
+
+class TestCellIndex(unittest.TestCase):
+    def test_query(self):
+        boxes = [[(x * 30, 500 - y * 12, x * 30 + 20, 508 - y * 12)
+                  if (x + y) % 3 else None for x in range(8)]
+                 for y in range(30)]
+        index = CellIndex(boxes, bucket_size=25)
+        for query in [(40, 300, 130, 420), (0, 0, 1000, 1000), (45, 0, 55, 1000),
+                      (-1, -1, 0, 0)]:
+            for inside in (False, True):
+                expected = [
+                    (row, col) for row, line in enumerate(boxes)
+                    for col, box in enumerate(line) if box is not None and (
+                        query[0] <= box[0] and box[2] <= query[2] and
+                        query[1] <= box[1] and box[3] <= query[3] if inside else
+                        box[0] <= query[2] and query[0] <= box[2] and
+                        box[1] <= query[3] and query[1] <= box[3])]
+                self.assertEqual(index.query(*query, inside=inside), expected)
+        self.assertEqual(index.query(-math.inf, 0, math.inf, 400),
+                         index.query(-1000, 0, 1000, 400))
+        self.assertEqual(CellIndex([]).query(0, 0, 10, 10), [])
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
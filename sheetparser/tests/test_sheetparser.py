@@ -1,3 +1,6 @@
+import io
+import mmap
+import os
 import unittest
 
 import numpy as np
@@ -10,9 +13,13 @@ from sheetparser import (Document, CellRange, RbColIterator, RbRowIterator,
                          Rows,
                          Table, FillData, HeaderTableTransform,
                          Empty, GetValue,
-                         TableNotEmpty, empty_line, Sequence
+                         TableNotEmpty, empty_line, Sequence,
+                         ConfigurationError, load_workbook
                          )
-from sheetparser.documents import SheetDocument
+from sheetparser.documents import MergedCells, SheetDocument, sniff_format
+from sheetparser.utils import file_contents, open_source
+
+TEST_DIR = os.path.dirname(__file__)
 
 
 class DummyWorkbook(Document):
@@ -128,6 +135,41 @@ class TestArray(unittest.TestCase):
         self.assertSequenceEqual(context.root['or_']['line'], [1, 1, 1, 1, 1])
 
 
+class TestMergedCells(unittest.TestCase):
+    def test_lookup(self):
+        ranges = [(0, 1, 0, 16384), (2, 5, 1, 3), (3, 4, 4, 6), (10, 12, 0, 2)]
+        merged = MergedCells(ranges)
+        expected = {}
+        for top, bottom, left, right in ranges:
+            for row in range(top, bottom):
+                for col in range(left, min(right, 20)):
+                    if (row, col) != (top, left):
+                        expected[row, col] = (top, left)
+        for row in range(15):
+            for col in range(20):
+                self.assertEqual(merged.get((row, col)), expected.get((row, col)))
+        self.assertEqual(merged[0, 16383], (0, 0))
+        self.assertNotIn((0, 16384), merged)
+        self.assertEqual(merged.find(3, 5), (3, 4, 4, 6))
+        self.assertEqual(len(merged), 4)
+        self.assertRaises(KeyError, merged.__getitem__, (2, 1))
+
+    def test_tall_ranges(self):
+        # a label merged down a column, next to a merge on every row
+        ranges = [(0, 1000, 0, 1)] + [(row, row + 1, 1, 3) for row in range(1000)]
+        merged = MergedCells(ranges)
+        self.assertEqual(merged[999, 0], (0, 0))
+        self.assertEqual(merged[500, 2], (500, 1))
+        self.assertIsNone(merged.get((1000, 0)))
+        stored = sum(len(lefts) for lefts, __ in merged._nodes.values())
+        self.assertLess(stored, 1000 + 2 * 11)
+
+    def test_empty(self):
+        merged = MergedCells()
+        self.assertIsNone(merged.get((0, 0)))
+        self.assertNotIn((3, 3), merged)
+
+
 class TestBug(unittest.TestCase):
     def test_many_many(self):
         sheet = DummySheet('dummy', [['h'] * 2, ['l', 'd'], [''] * 2])
@@ -141,5 +183,61 @@ class TestBug(unittest.TestCase):
         pattern.match_range(sheet, context)
         self.assertEqual(context.root.many[0].table.data,[['d']])
 
+class TestLoadSource(unittest.TestCase):
+    def read(self, filename):
+        with open(os.path.join(TEST_DIR, filename), 'rb') as f:
+            return f.read()
+
+    def test_sniff(self):
+        for filename, ext in [('test_table1.xls', '.xls'),
+                              ('test_table1.xlsx', '.xlsx'),
+                              ('test_table1.pdf', '.pdf')]:
+            fp = open_source(self.read(filename))
+            self.assertEqual(sniff_format(fp), ext)
+            self.assertEqual(fp.tell(), 0)
+        self.assertEqual(sniff_format(open_source(b'a;b\n1;2\n')), '.csv')
+        with self.assertRaises(ConfigurationError):
+            sniff_format(open_source(b'\0\1\2'))
+
+    def test_sources(self):
+        for filename in ['test_table1.xls', 'test_table1.xlsx']:
+            data = self.read(filename)
+            with open(os.path.join(TEST_DIR, filename), 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                for source in [data, memoryview(data), io.BytesIO(data), f, mapped]:
+                    for with_formatting in [False, True]:
+                        if hasattr(source, 'seek'):
+                            source.seek(0)
+                        wbk = load_workbook(source, with_formatting=with_formatting)
+                        sheet = wbk['Sheet1']
+                        self.assertEqual(sheet.cell(1, 1).value, 'table 1')
+                        if hasattr(wbk, 'close'):
+                            wbk.close()
+                mapped.close()
+
+    def test_backend(self):
+        data = self.read('test_table1.xlsx')
+        wbk = load_workbook(data, with_backend='_xlsx')
+        self.assertEqual(type(wbk).__name__, 'xlsxWorkbook')
+        self.assertEqual(wbk['Sheet1'].cell(1, 1).value, 'table 1')
+        wbk.close()
+
+    def test_csv(self):
+        sheet = load_workbook(b'a,b\nc,d\n')[0]
+        self.assertEqual(sheet.name, 'Sheet1')
+        self.assertEqual(sheet.row_data(1, 0, 2).values, ['c', 'd'])
+
+    def test_file_contents(self):
+        data = self.read('test_table1.xls')
+        self.assertIs(file_contents(open_source(data)), data)
+        self.assertIs(file_contents(open_source(memoryview(data))), data)
+        self.assertEqual(file_contents(io.BytesIO(data)), data)
+        for fp in (open_source(data), io.BytesIO(data),
+                   open(os.path.join(TEST_DIR, 'test_table1.xls'), 'rb')):
+            with fp:
+                fp.seek(8)
+                self.assertEqual(file_contents(fp), data[8:])
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
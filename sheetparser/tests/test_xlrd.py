@@ -1,5 +1,8 @@
+import datetime
 import unittest
 
+from sheetparser.backends._xlrd import xldate_values
+from sheetparser.documents import CellColumn, CellRow
 from sheetparser.patterns import VisibleRows
 from sheetparser.tests.common import *
 
@@ -38,6 +41,50 @@ class TestFormatXLRD(TestFormat, unittest.TestCase):
         test = [l[0].value for l in VisibleRows().iter_doc(sheet)]
         self.assertEqual(test, ['With hidden rows', '', 'Table 1', 'a1', 'a4'])
 
+    def test_on_demand(self):
+        book = self.wbk.wbk
+        loaded = []
+        get_sheet = book.get_sheet
+        book.get_sheet = lambda index, *args: loaded.append(index) or get_sheet(index, *args)
+        pattern = Workbook({'Sheet2': Sheet('sheet', Rows, Table, Empty, Table)})
+        pattern.match_workbook(self.wbk, ListContext())
+        self.assertEqual(loaded, [book.sheet_names().index('Sheet2')])
+        self.assertFalse(any(book.sheet_loaded(i) for i in range(book.nsheets)))
+        self.assertEqual(self.wbk['Sheet2'].cell(1, 1).value, 'a11')
+
+    def test_line_data(self):
+        for sheet in self.wbk:
+            for row in range(sheet.height):
+                cells = [sheet.cell(row, col) for col in range(sheet.width)]
+                data = sheet.row_data(row, 0, sheet.width)
+                self.assertEqual(data.values, [c.value for c in cells])
+                self.assertEqual(data.empty, [c.is_empty for c in cells])
+                self.assertEqual(data.merged, [c.is_merged for c in cells])
+                self.assertEqual([c.value for c in CellRow(sheet, row)],
+                                 [c.value for c in cells])
+            for col in range(sheet.width):
+                cells = [sheet.cell(row, col) for row in range(sheet.height)]
+                data = sheet.col_data(col, 0, sheet.height)
+                self.assertEqual(data.values, [c.value for c in cells])
+                self.assertEqual(data.merged, [c.is_merged for c in cells])
+                self.assertEqual([c.has_borders(BORDERS_VERTICAL) for c in CellColumn(sheet, col)],
+                                 [c.has_borders(BORDERS_VERTICAL) for c in cells])
+
+    def test_dates(self):
+        sheet = self.wbk['Sheet8']
+        self.assertEqual(sorted(sheet.dates), [(0, 1), (3, 1)])
+        self.assertIs(sheet.cell(0, 1).value, sheet.dates[0, 1])
+        self.assertEqual(sheet.row_data(3, 0, sheet.width).values[1],
+                         datetime.time(2, 30))
+        self.assertEqual(xldate_values([0.0, 0.5, 61.0, 1.0, -1.0], 0),
+                         [datetime.time(0), datetime.time(12),
+                          datetime.datetime(1900, 3, 1), None, None])
+
+    def test_xf_table(self):
+        sheet = self.wbk['Sheet7']
+        self.assertIs(sheet.cell(0, 7).fill, self.wbk['Sheet7'].cell(0, 7).fill)
+        self.assertEqual(len(self.wbk.xf_table.border_masks), len(self.wbk.wbk.xf_list))
+
 
 class TestSimplePatternXLRD(TestSimplePattern, unittest.TestCase):
     backend = 'sheetparser.backends._xlrd'
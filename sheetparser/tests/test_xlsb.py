@@ -0,0 +1,153 @@
+import datetime
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+import zipfile
+
+from sheetparser import (Empty, PythonObjectContext, Rows, Sheet, Table,
+                         VisibleRows, Workbook, load_workbook)
+
+try:
+    import pyxlsb
+except ImportError:
+    pyxlsb = None
+
+RELS = '''<?xml version="1.0" encoding="UTF-8"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="worksheet" Target="worksheets/sheet1.bin"/>
+</Relationships>'''
+
+
+def record(recid, data=b''):
+    header = bytes([recid]) if recid < 0x80 else struct.pack('<H', recid)
+    size = len(data)
+    while True:
+        byte = size & 0x7F
+        size >>= 7
+        header += bytes([byte | (0x80 if size else 0)])
+        if not size:
+            return header + data
+
+
+def wide_string(text):
+    return struct.pack('<I', len(text)) + text.encode('utf-16-le')
+
+
+def cell(col, style, recid, fmt, value):
+    return record(recid, struct.pack('<II' + fmt, col, style, value))
+
+
+def make_xlsb(filename, rows, hidden_rows=(), hidden=False, date1904=False,
+              inline_strings=False):
+    strings = []
+    epoch = datetime.date(1904, 1, 1) if date1904 else datetime.date(1899, 12, 30)
+    sheet = record(404, struct.pack('<IIII', 0, len(rows) - 1, 0, 2)) + record(401)
+    for row, values in enumerate(rows):
+        flags = 0x1000 if row in hidden_rows else 0  # fDyZero
+        sheet += record(0, struct.pack('<IIHH', row, 0, 0, flags))
+        for col, value in enumerate(values):
+            if isinstance(value, str) and inline_strings:
+                sheet += record(6, struct.pack('<II', col, 0) + wide_string(value))
+            elif isinstance(value, str):
+                strings.append(value)
+                sheet += cell(col, 0, 7, 'I', len(strings) - 1)
+            elif isinstance(value, datetime.date):
+                serial = (value - epoch).days
+                sheet += cell(col, 1, 5, 'd', float(serial))
+            elif value is not None:
+                sheet += cell(col, 0, 5, 'd', value)
+    sheet += record(402)
+    sst = record(415, struct.pack('<II', len(strings), len(strings)))
+    for text in strings:
+        sst += record(19, b'\0' + wide_string(text))
+    styles = (record(1257) + record(47, struct.pack('<HH', 0, 0) + b'\0' * 12) +
+              record(47, struct.pack('<HH', 0, 14) + b'\0' * 12) + record(1258))
+    workbook = (record(153, struct.pack('<I', int(date1904))) + record(399) +
+                record(412, struct.pack('<II', int(hidden), 1) + wide_string('rId1') +
+                       wide_string('Data')) + record(400))
+    with zipfile.ZipFile(filename, 'w') as zfile:
+        zfile.writestr('xl/workbook.bin', workbook)
+        zfile.writestr('xl/_rels/workbook.bin.rels', RELS)
+        zfile.writestr('xl/worksheets/sheet1.bin', sheet)
+        zfile.writestr('xl/sharedStrings.bin', sst)
+        zfile.writestr('xl/styles.bin', styles)
+
+
+@unittest.skipIf(pyxlsb is None, 'pyxlsb is not installed')
+class TestXlsb(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'test.xlsb')
+        rows = [['table', 'a', 'b'], ['x', 1.5, datetime.date(2017, 12, 1)],
+                [None, None, None]]
+        rows += [['row %d' % i, float(i), None] for i in range(3, 50)]
+        make_xlsb(self.filename, rows, hidden_rows={5, 40})
+        self.wbk = load_workbook(self.filename, with_backend='_xlsb', window=4)
+
+    def tearDown(self):
+        self.wbk.close()
+        shutil.rmtree(self.directory)
+
+    def test_read(self):
+        sheet = self.wbk['Data']
+        self.assertEqual((sheet.height, sheet.width), (50, 3))
+        self.assertEqual(sheet.cell(1, 1).value, 1.5)
+        self.assertEqual(sheet.cell(1, 2).value, datetime.datetime(2017, 12, 1))
+        self.assertTrue(sheet.cell(2, 0).is_empty)
+        for row in [40, 3, 49, 10, 11, 60]:
+            self.assertEqual(sheet.cell(row, 0).value,
+                             'row %d' % row if row < 50 else '')
+        sheet.close()
+
+    def test_hidden(self):
+        sheet = self.wbk['Data']
+        self.assertFalse(sheet.is_hidden())
+        self.assertEqual([row for row in range(50) if sheet.is_hidden_row(row)],
+                         [5, 40])
+        self.assertTrue(sheet.is_hidden_row(5))
+        sheet.close()
+        filename = os.path.join(self.directory, 'hidden.xlsb')
+        make_xlsb(filename, [['a']], hidden=True)
+        wbk = load_workbook(filename, with_backend='_xlsb')
+        self.assertTrue(wbk['Data'].is_hidden())
+        wbk.close()
+
+    def test_inline_strings(self):
+        filename = os.path.join(self.directory, 'inline.xlsb')
+        make_xlsb(filename, [['inline', 2.5]], inline_strings=True)
+        wbk = load_workbook(filename, with_backend='_xlsb')
+        sheet = wbk['Data']
+        self.assertEqual([sheet.cell(0, col).value for col in range(2)],
+                         ['inline', 2.5])
+        sheet.close()
+        wbk.close()
+
+    def test_date1904(self):
+        filename = os.path.join(self.directory, 'date1904.xlsb')
+        make_xlsb(filename, [[datetime.date(2017, 12, 1)]], date1904=True)
+        wbk = load_workbook(filename, with_backend='_xlsb')
+        self.assertTrue(wbk.date1904)
+        sheet = wbk['Data']
+        self.assertEqual(sheet.cell(0, 0).value, datetime.datetime(2017, 12, 1))
+        sheet.close()
+        wbk.close()
+        self.assertFalse(self.wbk.date1904)
+
+    def test_visible_rows(self):
+        pattern = Workbook({'Data': Sheet('sheet', VisibleRows, Table, Empty)})
+        context = PythonObjectContext()
+        pattern.match_workbook(self.wbk, context)
+        self.assertEqual(context[0].table.data, [[1.5, datetime.datetime(2017, 12, 1)]])
+
+    def test_pattern(self):
+        pattern = Workbook({'Data': Sheet('sheet', Rows, Table, Empty)})
+        context = PythonObjectContext()
+        pattern.match_workbook(self.wbk, context)
+        self.assertEqual(context[0].table.data, [[1.5, datetime.datetime(2017, 12, 1)]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import tempfile
+import unittest
+
+from sheetparser.backends import _xlsx
+from sheetparser.patterns import VisibleRows
+from sheetparser.tests.common import *
+
+
+class LoadXlsx(object):
+    backend = 'sheetparser.backends._xlsx'
+    filename = 'test_table1.xlsx'
+    load_options = {'with_backend': '_xlsx'}
+
+
+class TestReadSheetXlsx(LoadXlsx, TestReadSheetBase, unittest.TestCase):
+    pass
+
+
+class TestFormatXlsx(LoadXlsx, TestFormat, unittest.TestCase):
+
+    def test_fill(self):
+        sheet = self.wbk['Sheet7']
+        self.assertEqual(sheet.cell(0, 7).fill.color1, (200, 201, 202))
+        self.assertEqual(sheet.cell(0, 6).fill.color1, {'theme': 5})
+        self.assertFalse(sheet.cell(0, 9).is_filled)
+
+    def test_hidden(self):
+        sheet = self.wbk['Sheet7']
+        test = [l[0].value for l in VisibleRows().iter_doc(sheet)]
+        self.assertEqual(test, ['With hidden rows', '', 'Table 1', 'a1', 'a4'])
+
+    def test_compact(self):
+        sheet = self.wbk['Sheet2']
+        data = sheet.data
+        self.assertEqual(data.kinds[data.find(0, 0)], _xlsx.SHARED_STRING)
+        self.assertEqual(self.wbk.shared_strings[int(data.numbers[data.find(0, 0)])],
+                         'table 1')
+        self.assertIsNone(data.find(100, 0))
+        self.assertIs(sheet.cell(0, 0).formatting,
+                      self.wbk['Sheet2'].cell(0, 0).formatting)
+        self.assertEqual(sheet.row_data(1, 0, 6).values,
+                         [1.0, 'a11', 'b11', 'c11', '', ''])
+
+    def test_dates(self):
+        self.assertTrue(_xlsx.is_date_format('yyyy-mm-dd h:mm'))
+        self.assertTrue(_xlsx.is_date_format('[h]:mm:ss'))
+        self.assertFalse(_xlsx.is_date_format('"day" 0.00'))
+        self.assertFalse(_xlsx.is_date_format('[Red]0.00'))
+        self.assertEqual(_xlsx.xldate_value(0.5), datetime.time(12))
+        self.assertEqual(_xlsx.xldate_value(1), datetime.datetime(1900, 1, 1))
+        self.assertEqual(_xlsx.xldate_value(61), datetime.datetime(1900, 3, 1))
+        self.assertEqual(_xlsx.xldate_value(1, True), datetime.datetime(1904, 1, 2))
+        self.assertEqual(_xlsx.xldate_value(59), datetime.datetime(1900, 2, 28))
+        self.assertEqual(_xlsx.xldate_value(60), 60)
+        self.assertEqual(_xlsx.xldate_value(60.5), 60.5)
+        self.assertEqual(_xlsx.xldate_value(-1), -1)
+        self.assertEqual(_xlsx.xldate_value(-0.5, True), -0.5)
+        self.assertEqual(_xlsx.xldate_value(1e10), 1e10)
+        self.assertEqual(_xlsx.xldate_value(2958465), datetime.datetime(9999, 12, 31))
+
+    def test_numbers(self):
+        import openpyxl
+
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.append([1e-05, 3, 2.5, 1e20, 1e10])
+        ws['E1'].number_format = 'yyyy-mm-dd'
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'numbers.xlsx')
+            wb.save(filename)
+            wbk = load_workbook(filename, with_backend='_xlsx')
+            values = wbk[0].row_data(0, 0, 5).values
+            wbk.close()
+        self.assertEqual(values, [1e-05, 3, 2.5, 1e20, 1e10])
+        self.assertIs(type(values[1]), int)
+        self.assertEqual(_xlsx._cell_kind('', 'n', []), (_xlsx.EMPTY, 0))
+
+
+class TestSimplePatternXlsx(LoadXlsx, TestSimplePattern, unittest.TestCase):
+    pass
+
+
+class TestComplexXlsx(LoadXlsx, TestComplex, unittest.TestCase):
+    pass
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,6 @@
 import functools
+import io
+import mmap
 import warnings
 
 import six
@@ -49,3 +51,79 @@ def instantiate_if_class(cls_or_inst, cls, **kwargs):
 
 def instantiate_if_class_lst(lst, cls, **kwargs):
     return [instantiate_if_class(c, cls, **kwargs) for c in lst]
+
+
+BUFFER_TYPES = (bytes, bytearray, memoryview, mmap.mmap)
+
+
+class BufferFile(io.RawIOBase):
+    """A read-only binary file over a buffer (bytes, memoryview, mmap).
+    The buffer is not copied: `data` is the buffer itself. A mmap is
+    sliced directly, so that it can be closed while the file exists."""
+
+    def __init__(self, data):
+        super(BufferFile, self).__init__()
+        self.data = data
+        if isinstance(data, mmap.mmap):
+            self.view = data
+        else:
+            self.view = memoryview(data).cast('B')
+        self.pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        size = max(min(len(b), len(self.view) - self.pos), 0)
+        b[:size] = self.view[self.pos:self.pos + size]
+        self.pos += size
+        return size
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence == io.SEEK_END:
+            offset += len(self.view)
+        if offset < 0:
+            raise ValueError('negative seek position %d' % offset)
+        self.pos = offset
+        return offset
+
+    def tell(self):
+        return self.pos
+
+    def close(self):
+        if isinstance(self.view, memoryview):
+            self.view.release()
+        super(BufferFile, self).close()
+
+
+def open_source(source):
+    """returns a seekable binary file to read a buffer or a file
+    object. A file that can't seek is read in memory"""
+    if isinstance(source, BUFFER_TYPES):
+        return io.BufferedReader(BufferFile(source))
+    if not source.seekable():
+        return io.BytesIO(source.read())
+    return source
+
+
+def file_contents(fp):
+    """the content of a file opened by `open_source` from its current
+    position, as bytes or as a mmap for the libraries that need the
+    whole file. The buffer or the file is used when possible, rather
+    than a copy"""
+    position = fp.tell()
+    data = getattr(getattr(fp, 'raw', None), 'data', None)
+    if isinstance(data, memoryview) and data.contiguous:
+        if isinstance(data.obj, (bytes, mmap.mmap)) and data.nbytes == len(data.obj):
+            data = data.obj
+    if not isinstance(data, (bytes, mmap.mmap)):
+        try:
+            data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError):
+            return fp.read()
+    return data[position:] if position else data